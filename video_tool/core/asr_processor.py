@@ -1,8 +1,260 @@
 import os
-import datetime
+import re
+import logging
+import threading
+from functools import lru_cache
+from operator import attrgetter
+
+# 调试信息走 logging（默认不输出），面向用户的进度提示仍用 print
+logger = logging.getLogger(__name__)
+
+# orjson 可选：解析转录结果 JSON 更快（未安装时回退到标准库 json）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    import json
+    _json_loads = json.loads
+
+# 句末标点（中英文）
+_SENTENCE_TERMINATORS = frozenset('.!?。！？')
+
+# 句子：非句末字符 + 句末标点（中英文），或末尾没有标点的剩余文本
+_SENTENCE_RE = re.compile(r'[^.!?。！？]*[.!?。！？]+|[^.!?。！？]+')
+
+# AI 优化输出行 "序号|开始|结束|文本"，以及 SRT 时间戳 HH:MM:SS,mmm / MM:SS,mmm
+_AI_LINE_RE = re.compile(r'^(\d+)\|([^|]+)\|([^|]+)\|(.+)$')
+_TS_HMS_RE = re.compile(r'(\d+):(\d+):(\d+)[,.](\d+)')
+_TS_MS_RE = re.compile(r'(\d+):(\d+)[,.](\d+)')
+
+# Whisper 采样率，也是 faster-whisper VAD 返回的采样点单位
+_SAMPLING_RATE = 16000
+# VAD 检测阈值的默认值（串行和并行转录共用）
+_DEFAULT_VAD_THRESHOLD = 0.5
+
+# 固定路径（模块加载时计算一次）
+_CORE_DIR = os.path.dirname(__file__)
+_WHISPER_SCRIPT = os.path.join(_CORE_DIR, 'run_whisper.py')
+_MODEL_DIR = os.path.join(os.path.dirname(_CORE_DIR), 'models', 'whisper')
+_BUNDLED_FFMPEG = os.path.join(_CORE_DIR, 'ffmpeg.exe')
+
+# AI 优化结果的磁盘缓存目录和有效期（秒）
+_AI_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'vttsub', 'ai_opt')
+_AI_CACHE_TTL = 7 * 24 * 3600
+
+# 并行转录时每个工作进程持有的模型（由 _init_faster_whisper_worker 加载一次）
+_worker_model = None
+
+
+def _collect_faster_whisper_segments(segments_generator, offset=0.0):
+    """收集 faster-whisper 的转录结果，时间戳统一加上 offset（秒）"""
+    segments = []
+    for segment in segments_generator:
+        seg_data = {
+            "start": segment.start + offset,
+            "end": segment.end + offset,
+            "text": segment.text.strip(),
+        }
+        
+        # 添加词级时间戳
+        if segment.words:
+            seg_data["words"] = [
+                {
+                    "word": word.word,
+                    "start": word.start + offset,
+                    "end": word.end + offset,
+                    "probability": word.probability
+                }
+                for word in segment.words
+            ]
+        
+        segments.append(seg_data)
+    return segments
+
+
+def _init_faster_whisper_worker(model_name, device, compute_type, model_dir, cpu_threads):
+    """工作进程初始化：限制线程数并加载一次模型"""
+    global _worker_model
+    # 避免多个进程的线程数叠加超过 CPU 核数
+    os.environ["OMP_NUM_THREADS"] = str(cpu_threads)
+    os.environ["MKL_NUM_THREADS"] = str(cpu_threads)
+    
+    from faster_whisper import WhisperModel
+    _worker_model = WhisperModel(
+        model_name,
+        device=device,
+        compute_type=compute_type,
+        download_root=model_dir,
+        cpu_threads=cpu_threads
+    )
+
+
+def _transcribe_audio_chunk(audio, offset, options):
+    """在工作进程中转录一个音频片段，返回 (段落列表, 检测到的语言)"""
+    segments_generator, info = _worker_model.transcribe(audio, **options)
+    return _collect_faster_whisper_segments(segments_generator, offset), info.language
+
+
+@lru_cache(maxsize=None)
+def _third_party_endpoint(api_url):
+    """补全 OpenAI 兼容接口的转录地址（按 URL 缓存）"""
+    url = api_url
+    if not url.endswith('/transcriptions'):
+        if not url.endswith('/'):
+            url += '/'
+        url += 'v1/audio/transcriptions'
+    return url
+
+
+def _make_http_session(retry, pool_maxsize=10):
+    """创建带重试策略和 keep-alive 连接池的 requests 会话"""
+    import requests
+    from requests.adapters import HTTPAdapter
+    
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    session.headers.update({'Accept': 'application/json'})
+    return session
+
+
+@lru_cache(maxsize=1 << 16)
+def _format_srt_ms(total_ms):
+    """毫秒数格式化为 SRT 时间戳（相邻字幕首尾相接、保存和 AI 优化都会重复格式化同一时间点）"""
+    total_seconds, millis = divmod(total_ms, 1000)
+    minutes, secs = divmod(total_seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+
+
+def _stretch_segments(segments, old_span, new_span):
+    """把 segments 的时间从 old_span (开始, 结束) 线性映射到 new_span"""
+    old_start, old_end = old_span
+    new_start, new_end = new_span
+    scale = (new_end - new_start) / (old_end - old_start) if old_end > old_start else 1.0
+    return [
+        {**seg,
+         "start": new_start + (seg["start"] - old_start) * scale,
+         "end": new_start + (seg["end"] - old_start) * scale}
+        for seg in segments
+    ]
+
+
+def _supports_cache_control(api_url, model):
+    """Anthropic（Claude）模型需要显式标记 cache_control 才会缓存提示词前缀"""
+    return 'anthropic' in api_url.lower() or 'claude' in model.lower()
+
+
+@lru_cache(maxsize=None)
+def _third_party_model_name(model_size):
+    """从模型选项中提取模型名（去掉空格后的说明文字，按选项缓存）"""
+    return model_size.split(' ', 1)[0]
+
+
+def _first_attr_getter(obj, names, default=0):
+    """返回读取 obj 上第一个存在的属性的函数，均不存在时返回固定默认值"""
+    for name in names:
+        if hasattr(obj, name):
+            return attrgetter(name)
+    return lambda _: default
+
+
+def _plan_speech_chunks(speech_timestamps, total_samples, max_chunk_samples):
+    """
+    将 VAD 语音段合并为不超过 max_chunk_samples 的片段
+    
+    相邻片段在两段语音之间静音的中点切开，保证不会从词中间截断
+    
+    Returns:
+        [(起始采样点, 结束采样点), ...]
+    """
+    chunks = []
+    chunk_start = 0
+    prev_end = None
+    for ts in speech_timestamps:
+        if prev_end is not None and ts["end"] - chunk_start > max_chunk_samples:
+            cut = (prev_end + ts["start"]) // 2
+            chunks.append((chunk_start, cut))
+            chunk_start = cut
+        prev_end = ts["end"]
+    if prev_end is not None:
+        chunks.append((chunk_start, total_samples))
+    return chunks
+
+
+class _ResponseCache:
+    """按 key 精确匹配的磁盘缓存，每个 key 一个 JSON 文件，超过 ttl 秒视为过期并删除"""
+    
+    def __init__(self, cache_dir=_AI_CACHE_DIR, ttl=_AI_CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        # 每个实例首次写入时清理一次过期文件
+        self._pruned = False
+    
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+    
+    def get(self, key):
+        """返回缓存的值，未命中、过期或文件损坏时返回 None"""
+        import time
+        
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) > self.ttl:
+                os.remove(path)
+                return None
+            with open(path, 'rb') as f:
+                return _json_loads(f.read())['parsed']
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+    
+    def put(self, key, value):
+        """写入缓存（先写临时文件再替换，并发写同一 key 也不会读到半个文件）"""
+        import json
+        
+        if not self._pruned:
+            self._pruned = True
+            self.prune()
+        
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"parsed": value}, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"写入 AI 优化缓存失败: {e}")
+    
+    def prune(self):
+        """删除超过 ttl 的缓存文件（包括中断写入遗留的临时文件）"""
+        import time
+        
+        cutoff = time.time() - self.ttl
+        try:
+            subdirs = os.scandir(self.cache_dir)
+        except OSError:
+            return
+        with subdirs:
+            for subdir in subdirs:
+                if not subdir.is_dir():
+                    continue
+                try:
+                    with os.scandir(subdir.path) as entries:
+                        for entry in entries:
+                            try:
+                                if entry.stat().st_mtime < cutoff:
+                                    os.remove(entry.path)
+                            except OSError:
+                                pass
+                except OSError:
+                    pass
+
 
 class ASRProcessor:
-    def __init__(self, model_size="large-v3-turbo", engine_type="faster-whisper", api_key=None, api_url=None):
+    def __init__(self, model_size="large-v3-turbo", engine_type="faster-whisper", api_key=None, api_url=None,
+                 compute_type="auto"):
         """
         Initialize the ASR processor.
         
@@ -11,6 +263,7 @@ class ASRProcessor:
             engine_type (str): "faster-whisper" (推荐) 或 "whisper" (兼容)
             api_key (str): 保留参数（未使用）
             api_url (str): 保留参数（未使用）
+            compute_type (str): Faster-Whisper 计算类型，"auto" 时 GPU 用 float16、CPU 用 int8 量化
         """
         self.model_size = model_size
         # 强制使用 faster-whisper
@@ -22,13 +275,85 @@ class ASRProcessor:
         self.pause_threshold = 0.6  # 停顿阈值（秒），更敏感的断句
         self.max_words_per_segment = 18  # 每段最大词数，控制字幕长度
         self.max_segment_duration = 7.0  # 每段最大时长（秒）
+        # 词级对齐：关闭后不生成词级时间戳（省去额外的对齐解码），也不按词重新分段
+        self.enable_word_alignment = True
         # VAD 参数
         self.use_vad = True
-        self.vad_threshold = 0.5
+        self.vad_threshold = _DEFAULT_VAD_THRESHOLD
         # Faster-Whisper 参数
-        self.compute_type = "float16"  # GPU 使用 float16
+        self.compute_type = compute_type  # auto: GPU 使用 float16，CPU 使用 int8
+        self._model_key = None  # 已加载模型的 (模型名, 设备, 计算类型)
+        # 长音频并行转录（仅 CPU）：按 VAD 静音切分为约 30 秒的片段，分发到多个进程
+        self.parallel_workers = 1  # 工作进程数，1 表示不并行
+        self.parallel_min_duration = 60.0  # 音频超过该时长（秒）才并行
+        # AI 优化的并发请求数（各批次互不依赖，同时发送）
+        self.ai_max_workers = 5
+        # AI 优化结果缓存（相同模型、提示词和字幕批次直接复用上次结果）
+        self._ai_cache = _ResponseCache()
         # Prompt 提示词（帮助识别专有名词）
         self.initial_prompt = None  # 可通过 set_prompt() 设置
+        # 常驻的 Whisper 子进程（首次使用时启动，close() 关闭）
+        self._whisper_proc = None
+        # 模型目录创建和子进程环境变量只准备一次
+        self._model_dir_ready = False
+        self._whisper_env = None
+        # ElevenLabs 客户端（含 HTTP 连接池）和 DashScope 全局配置复用，api_key 变化时才重建
+        self._elevenlabs_client = None
+        self._elevenlabs_key = None
+        self._dashscope_config = None
+        # 第三方 API 的 HTTP 会话（keep-alive），批量转录时复用 TCP/TLS 连接
+        self._http_session = None
+        # AI 优化请求单独使用一个会话：JSON 请求体可以安全重发，遇到 429/5xx 时重试
+        self._ai_http_session = None
+    
+    @property
+    def elevenlabs_client(self):
+        """复用的 ElevenLabs 客户端，批量转录时共享连接，避免每个文件重新握手"""
+        if self._elevenlabs_client is None or self._elevenlabs_key != self.api_key:
+            from elevenlabs.client import ElevenLabs
+            self._elevenlabs_client = ElevenLabs(api_key=self.api_key)
+            self._elevenlabs_key = self.api_key
+        return self._elevenlabs_client
+    
+    def _configure_dashscope(self):
+        """设置 DashScope 全局 api_key / 接口地址（配置不变时只设置一次）"""
+        import dashscope
+        config = (self.api_key, self.api_url)
+        if self._dashscope_config != config:
+            dashscope.api_key = self.api_key
+            dashscope.base_http_api_url = self.api_url
+            self._dashscope_config = config
+        return dashscope
+    
+    @property
+    def http_session(self):
+        """
+        第三方 ASR 上传复用的 requests 会话，只在连接失败时按指数退避重试
+        
+        上传的请求体可能是 MultipartEncoder 流，发送后无法重发，因此不按状态码重试
+        """
+        if self._http_session is None:
+            from urllib3.util.retry import Retry
+            
+            self._http_session = _make_http_session(Retry(total=3, backoff_factor=0.5))
+        return self._http_session
+    
+    @property
+    def ai_http_session(self):
+        """AI 优化复用的 requests 会话，连接失败或返回 429/5xx 时按指数退避重试 POST"""
+        if self._ai_http_session is None:
+            from urllib3.util.retry import Retry
+            
+            retry = Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                allowed_methods=None,  # 默认不重试 POST；AI 请求是 JSON 请求体，可安全重发
+                respect_retry_after_header=True
+            )
+            # 每个 AI 优化并发线程都能保留自己的 keep-alive 连接，超出连接池的连接用完会被丢弃
+            self._ai_http_session = _make_http_session(retry, pool_maxsize=max(8, self.ai_max_workers))
+        return self._ai_http_session
         
     def set_prompt(self, prompt: str):
         """设置 Whisper prompt，帮助识别专有名词"""
@@ -47,7 +372,7 @@ class ASRProcessor:
 
     def transcribe(self, audio_path, output_srt_path=None, language_code=None, diarize=False,
                    enable_ai_optimize=False, ai_api_key=None, ai_api_url=None, ai_model=None,
-                   ai_optimize_level="medium", progress_callback=None):
+                   ai_optimize_level="medium", progress_callback=None, need_word_timestamps=None):
         """
         Transcribe audio file to text (SRT format).
         
@@ -62,6 +387,7 @@ class ASRProcessor:
             ai_model (str): AI 模型名称
             ai_optimize_level (str): 优化强度 "light"/"medium"/"heavy"
             progress_callback: 进度回调函数
+            need_word_timestamps (bool): 是否生成词级时间戳并按词优化分段，None 时使用 enable_word_alignment
             
         Returns:
             list: List of segments if output_srt_path is None.
@@ -75,21 +401,23 @@ class ASRProcessor:
             progress_callback("Step 1: 运行 Whisper ASR...")
         print("Step 1: Running Whisper ASR...")
         
-        raw_segments = self._transcribe_faster_whisper(audio_path, language_code)
+        if need_word_timestamps is None:
+            need_word_timestamps = self.enable_word_alignment
+        raw_segments = self._transcribe_faster_whisper(audio_path, language_code, need_word_timestamps)
         final_segments = raw_segments
         
         print(f"Whisper 转录完成: {len(raw_segments)} 条字幕")
         
         # Step 2: AI 优化（关键步骤！修正术语、合并破碎句子、去口语化）
-        print(f"[DEBUG] enable_ai_optimize={enable_ai_optimize}, ai_api_key={'有' if ai_api_key else '无'}")
+        logger.debug("enable_ai_optimize=%s, ai_api_key=%s", enable_ai_optimize, '有' if ai_api_key else '无')
         
         if enable_ai_optimize and ai_api_key:
             if progress_callback:
                 progress_callback("Step 2: AI 精修中（修正术语、合并句子）...")
             print("Step 2: Optimizing with AI (LLM)...")
-            print(f"[DEBUG] 使用模型: {ai_model or 'deepseek-chat'}")
-            print(f"[DEBUG] API URL: {ai_api_url or 'https://api.deepseek.com/v1/chat/completions'}")
-            print(f"[DEBUG] 优化强度: {ai_optimize_level}")
+            logger.debug("使用模型: %s", ai_model or 'deepseek-chat')
+            logger.debug("API URL: %s", ai_api_url or 'https://api.deepseek.com/v1/chat/completions')
+            logger.debug("优化强度: %s", ai_optimize_level)
             
             try:
                 final_segments = self.optimize_with_ai(
@@ -121,7 +449,7 @@ class ASRProcessor:
             if progress_callback:
                 progress_callback("⚠️ AI 优化已启用但未提供 API Key，请先在翻译模块配置")
         else:
-            print("[DEBUG] AI 优化未启用，跳过 Step 2")
+            logger.debug("AI 优化未启用，跳过 Step 2")
             if progress_callback:
                 progress_callback("跳过 AI 精修（未启用）")
         
@@ -134,38 +462,23 @@ class ASRProcessor:
         
         return final_segments
 
-    def _transcribe_whisper(self, audio_path):
-        """Transcribe using Whisper in a separate process to avoid DLL conflicts."""
+    def _start_whisper_worker(self):
+        """启动常驻的 Whisper 子进程（模型只加载一次，后续任务通过 stdin/stdout 交互）"""
         import subprocess
-        import json
         import sys
+        import threading
+        from collections import deque
         
-        # Get the path to the run_whisper.py script
-        script_path = os.path.join(os.path.dirname(__file__), 'run_whisper.py')
+        script_path = _WHISPER_SCRIPT
         
         # Verify script exists
         if not os.path.exists(script_path):
             raise FileNotFoundError(f"Whisper script not found: {script_path}")
         
-        # Model directory
-        model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'whisper')
-        os.makedirs(model_dir, exist_ok=True)
-        
-        # Check for bundled ffmpeg in the same directory as this script
-        core_dir = os.path.dirname(__file__)
-        ffmpeg_path = os.path.join(core_dir, 'ffmpeg.exe')
+        model_dir = self._get_model_dir()
+        env = self._get_whisper_env()
         
-        # Prepare environment with ffmpeg in PATH
-        env = os.environ.copy()
-        if os.path.exists(ffmpeg_path):
-            print(f"Found bundled ffmpeg: {ffmpeg_path}")
-            # Add the core directory to PATH so ffmpeg.exe can be found
-            env['PATH'] = core_dir + os.pathsep + env.get('PATH', '')
-        else:
-            print(f"Warning: ffmpeg.exe not found at {ffmpeg_path}")
-            print("Whisper requires ffmpeg. Please install it or place ffmpeg.exe in video_tool/core/")
-        
-        print(f"Transcribing {audio_path} with Whisper (subprocess)...")
+        print("Starting Whisper worker (subprocess)...")
         print(f"Model: {self.model_size}")
         print(f"Script path: {script_path}")
         print(f"Python executable: {sys.executable}")
@@ -177,103 +490,206 @@ class ASRProcessor:
         cmd = [
             sys.executable,
             script_path,
-            audio_path,
+            "--serve",
             "--model", self.model_size,
             "--model_dir", model_dir,
             "--use_vad", "true" if use_vad else "false",
             "--vad_threshold", str(vad_threshold)
         ]
         
+        # 协议输出为纯 ASCII JSON；stderr 日志按 UTF-8 解码并替换非法字节，避免 UnicodeDecodeError
+        proc = subprocess.Popen(
+            cmd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            text=True,
+            encoding='utf-8',
+            errors='replace',
+            env=env,  # Pass modified environment with ffmpeg in PATH
+            # Hide the console window on Windows
+            creationflags=subprocess.CREATE_NO_WINDOW if sys.platform == 'win32' else 0
+        )
+        
+        # 后台持续读取 stderr（防止管道写满阻塞子进程），保留最近的日志用于报错
+        stderr_tail = deque(maxlen=200)
+        
+        def drain_stderr():
+            for line in proc.stderr:
+                stderr_tail.append(line)
+        
+        stderr_thread = threading.Thread(target=drain_stderr, daemon=True)
+        stderr_thread.start()
+        
+        self._whisper_proc = proc
+        self._whisper_stderr = stderr_tail
+        self._whisper_stderr_thread = stderr_thread
+        self._whisper_proc_key = (self.model_size, use_vad)
+        return proc
+    
+    def _get_model_dir(self):
+        """返回 Whisper 模型目录（首次调用时创建）"""
+        if not self._model_dir_ready:
+            os.makedirs(_MODEL_DIR, exist_ok=True)
+            self._model_dir_ready = True
+        return _MODEL_DIR
+    
+    def _get_whisper_env(self):
+        """返回 Whisper 子进程的环境变量（缓存；有内置 ffmpeg 时将其目录加入 PATH）"""
+        if self._whisper_env is None:
+            env = os.environ.copy()
+            # Check for bundled ffmpeg in the same directory as this script
+            if os.path.exists(_BUNDLED_FFMPEG):
+                print(f"Found bundled ffmpeg: {_BUNDLED_FFMPEG}")
+                # Add the core directory to PATH so ffmpeg.exe can be found
+                env['PATH'] = _CORE_DIR + os.pathsep + env.get('PATH', '')
+            else:
+                print(f"Warning: ffmpeg.exe not found at {_BUNDLED_FFMPEG}")
+                print("Whisper requires ffmpeg. Please install it or place ffmpeg.exe in video_tool/core/")
+            self._whisper_env = env
+        return self._whisper_env
+    
+    def _get_whisper_worker(self):
+        """返回可用的 Whisper 子进程，模型或 VAD 配置变化、进程已退出时重新启动"""
+        proc = getattr(self, '_whisper_proc', None)
+        key = (self.model_size, getattr(self, 'use_vad', True))
+        if proc is not None and (proc.poll() is not None or self._whisper_proc_key != key):
+            self.close()
+            proc = None
+        if proc is None:
+            proc = self._start_whisper_worker()
+        return proc
+    
+    def close(self):
+        """关闭常驻的 Whisper 子进程和 HTTP 会话"""
+        import subprocess
+        
+        for attr in ('_http_session', '_ai_http_session'):
+            session = getattr(self, attr, None)
+            if session is not None:
+                setattr(self, attr, None)
+                session.close()
+        
+        proc = getattr(self, '_whisper_proc', None)
+        if proc is None:
+            return
+        self._whisper_proc = None
+        try:
+            if proc.poll() is None:
+                proc.stdin.write('{"cmd": "exit"}\n')
+                proc.stdin.flush()
+                proc.stdin.close()
+                proc.wait(timeout=10)
+        except (OSError, ValueError, subprocess.TimeoutExpired):
+            proc.kill()
+            proc.wait()
+    
+    def __del__(self):
         try:
-            # Run subprocess with creationflags for Windows to avoid console window issues
-            # Use startupinfo to hide console window on Windows
-            startupinfo = None
-            creationflags = 0
-            if sys.platform == 'win32':
-                startupinfo = subprocess.STARTUPINFO()
-                startupinfo.dwFlags |= subprocess.STARTF_USESHOWWINDOW
-                startupinfo.wShowWindow = subprocess.SW_HIDE
-                creationflags = subprocess.CREATE_NO_WINDOW
-            
-            # Run subprocess
-            # Capture binary output to avoid UnicodeDecodeError in _readerthread
-            process = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=False,  # Return bytes
-                check=False,
-                startupinfo=startupinfo,
-                creationflags=creationflags,
-                env=env  # Pass modified environment with ffmpeg in PATH
+            self.close()
+        except Exception:
+            pass
+    
+    def _whisper_error(self, stderr_str):
+        """根据子进程错误输出生成带解决方案的异常"""
+        if "DLL" in stderr_str or "1114" in stderr_str:
+            return RuntimeError(
+                f"Whisper 加载失败：PyTorch DLL 依赖问题\n\n"
+                f"解决方案：\n"
+                f"1. 推荐使用 ElevenLabs 或第三方 API（无需 PyTorch）\n"
+                f"2. 安装 Visual C++ Redistributable:\n"
+                f"   https://aka.ms/vs/17/release/vc_redist.x64.exe\n"
+                f"3. 重装 PyTorch CPU 版本:\n"
+                f"   pip install torch --index-url https://download.pytorch.org/whl/cpu\n\n"
+                f"详细错误: {stderr_str}"
             )
+        elif "WinError 2" in stderr_str or "找不到指定的文件" in stderr_str or "ffmpeg" in stderr_str.lower():
+            return RuntimeError(
+                f"Whisper 无法找到 ffmpeg\n\n"
+                f"解决方案：\n"
+                f"1. 将 ffmpeg.exe 放到 video_tool/core/ 目录下\n"
+                f"2. 或安装 ffmpeg 并添加到系统 PATH\n"
+                f"   下载地址: https://www.gyan.dev/ffmpeg/builds/\n\n"
+                f"详细错误: {stderr_str}"
+            )
+        return RuntimeError(f"Whisper subprocess failed: {stderr_str}")
+    
+    def _transcribe_whisper(self, audio_path, need_word_timestamps=True):
+        """Transcribe using a persistent Whisper subprocess to avoid DLL conflicts and repeated model loads."""
+        import json
+        
+        print(f"Transcribing {audio_path} with Whisper (subprocess)...")
+        
+        try:
+            proc = self._get_whisper_worker()
             
-            # Helper to safely decode bytes
-            def safe_decode(bytes_data):
-                if not bytes_data:
-                    return ""
-                try:
-                    return bytes_data.decode('utf-8')
-                except UnicodeDecodeError:
-                    try:
-                        return bytes_data.decode('gbk')
-                    except UnicodeDecodeError:
-                        return bytes_data.decode('utf-8', errors='replace')
-
-            stdout_str = safe_decode(process.stdout)
-            stderr_str = safe_decode(process.stderr)
-            
-            if process.returncode != 0:
-                print(f"Whisper subprocess error output: {stderr_str}")
-                
-                if "DLL" in stderr_str or "1114" in stderr_str:
-                    raise RuntimeError(
-                        f"Whisper 加载失败：PyTorch DLL 依赖问题\n\n"
-                        f"解决方案：\n"
-                        f"1. 推荐使用 ElevenLabs 或第三方 API（无需 PyTorch）\n"
-                        f"2. 安装 Visual C++ Redistributable:\n"
-                        f"   https://aka.ms/vs/17/release/vc_redist.x64.exe\n"
-                        f"3. 重装 PyTorch CPU 版本:\n"
-                        f"   pip install torch --index-url https://download.pytorch.org/whl/cpu\n\n"
-                        f"详细错误: {stderr_str}"
-                    )
-                elif "WinError 2" in stderr_str or "找不到指定的文件" in stderr_str or "ffmpeg" in stderr_str.lower():
-                    raise RuntimeError(
-                        f"Whisper 无法找到 ffmpeg\n\n"
-                        f"解决方案：\n"
-                        f"1. 将 ffmpeg.exe 放到 video_tool/core/ 目录下\n"
-                        f"2. 或安装 ffmpeg 并添加到系统 PATH\n"
-                        f"   下载地址: https://www.gyan.dev/ffmpeg/builds/\n\n"
-                        f"详细错误: {stderr_str}"
-                    )
-                else:
-                    raise RuntimeError(f"Whisper subprocess failed: {stderr_str}")
-            
-            # Parse JSON output
+            job = {
+                "audio_path": audio_path,
+                "use_vad": getattr(self, 'use_vad', True),
+                "vad_threshold": getattr(self, 'vad_threshold', 0.5),
+                "word_timestamps": need_word_timestamps
+            }
             try:
-                # stdout might contain other logs if not clean, try to find the JSON part
-                # But run_whisper.py only prints JSON to stdout, unless libraries print to stdout
-                # We'll try to parse the whole thing first
-                result = json.loads(stdout_str)
-                segments = result["segments"]
-                # 基于词级时间戳优化字幕分段
-                return self._optimize_segments_by_words(segments)
-            except json.JSONDecodeError:
-                # Try to find JSON object in the output (in case of noise)
-                import re
-                match = re.search(r'\{.*\}', stdout_str, re.DOTALL)
-                if match:
+                proc.stdin.write(json.dumps(job) + "\n")
+                proc.stdin.flush()
+            except (OSError, ValueError):
+                pass
+            
+            # 逐行读取结果：每个段落一行，以 done 或 error 结束
+            segments = []
+            finished = False
+            try:
+                while True:
+                    try:
+                        line = proc.stdout.readline()
+                    except (OSError, ValueError):
+                        line = ""
+                    
+                    if not line:
+                        # 子进程已退出（通常是模型加载失败）
+                        proc.wait()
+                        self._whisper_stderr_thread.join(timeout=5)
+                        stderr_str = "".join(self._whisper_stderr)
+                        print(f"Whisper subprocess error output: {stderr_str}")
+                        self._whisper_proc = None
+                        raise self._whisper_error(stderr_str)
+                    
                     try:
-                        result = json.loads(match.group(0))
-                        segments = result["segments"]
-                        return self._optimize_segments_by_words(segments)
-                    except:
-                        pass
-                raise RuntimeError(f"Failed to parse Whisper output: {stdout_str}")
+                        obj = _json_loads(line)
+                    except ValueError:
+                        obj = None
+                    if not isinstance(obj, dict):
+                        # 原生库直接写到 fd 1 的杂项输出，不属于协议，跳过
+                        logger.debug("Ignoring non-protocol Whisper output: %r", line)
+                        continue
+                    
+                    msg_type = obj.pop("type", None)
+                    if msg_type == "segment":
+                        segments.append(obj)
+                    elif msg_type == "done":
+                        finished = True
+                        break
+                    elif msg_type == "error":
+                        finished = True
+                        stderr_str = obj["error"]
+                        print(f"Whisper subprocess error output: {stderr_str}")
+                        raise self._whisper_error(stderr_str)
+            finally:
+                if not finished and self._whisper_proc is proc:
+                    # 本次任务的剩余输出还留在管道里，继续复用会让下一次转录读到错位的结果
+                    self._whisper_proc = None
+                    proc.kill()
+                    proc.wait()
+            
+            if not need_word_timestamps:
+                return segments
+            # 基于词级时间戳优化字幕分段
+            return self._optimize_segments_by_words(segments)
                 
         except Exception as e:
             raise RuntimeError(f"Error running Whisper subprocess: {str(e)}")
 
-    def _transcribe_faster_whisper(self, audio_path, language_code=None):
+    def _transcribe_faster_whisper(self, audio_path, language_code=None, need_word_timestamps=True):
         """
         使用 faster-whisper 进行转录（更快，内置 VAD）
         
@@ -292,7 +708,7 @@ class ASRProcessor:
                     f"或选择标准 Whisper 支持的模型: {', '.join(standard_whisper_models)}"
                 )
             print("faster-whisper 未安装，回退到标准 whisper")
-            return self._transcribe_whisper(audio_path)
+            return self._transcribe_whisper(audio_path, need_word_timestamps)
         
         import torch
         
@@ -310,25 +726,38 @@ class ASRProcessor:
         if model_name == "large":
             model_name = "large-v2"  # 默认使用 large-v2
         
-        print(f"Loading faster-whisper model: {model_name} on {device} ({compute_type})")
-        
         # 模型目录
-        model_dir = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'models', 'whisper')
-        os.makedirs(model_dir, exist_ok=True)
-        
-        # 加载模型
-        model = WhisperModel(
-            model_name,
-            device=device,
-            compute_type=compute_type,
-            download_root=model_dir
-        )
+        model_dir = self._get_model_dir()
+        
+        # 长音频在 CPU 上按 VAD 片段并行转录
+        audio = audio_path
+        workers = 1
+        parallel_workers = min(getattr(self, 'parallel_workers', 1), os.cpu_count() or 1)
+        if device == "cpu" and parallel_workers > 1:
+            from faster_whisper.audio import decode_audio
+            audio = decode_audio(audio_path, sampling_rate=_SAMPLING_RATE)
+            if len(audio) / _SAMPLING_RATE > getattr(self, 'parallel_min_duration', 60.0):
+                workers = parallel_workers
+        
+        # 加载模型（同一配置下复用已加载的模型，避免每次转录重新加载权重；
+        # 并行时由各工作进程自行加载）
+        model_key = (model_name, device, compute_type)
+        if workers == 1 and (self.model is None or self._model_key != model_key):
+            print(f"Loading faster-whisper model: {model_name} on {device} ({compute_type})")
+            self.model = WhisperModel(
+                model_name,
+                device=device,
+                compute_type=compute_type,
+                download_root=model_dir,
+                cpu_threads=(os.cpu_count() or 0) if device == "cpu" else 0
+            )
+            self._model_key = model_key
         
         # 优化的 VAD 参数（减少过度分段）
         vad_parameters = None
         if getattr(self, 'use_vad', True):
             # 获取 VAD 配置
-            vad_threshold = getattr(self, 'vad_threshold', 0.3)
+            vad_threshold = getattr(self, 'vad_threshold', _DEFAULT_VAD_THRESHOLD)
             min_silence_ms = getattr(self, 'vad_min_silence_ms', 1000)  # 增加到 1000ms
             speech_pad_ms = getattr(self, 'vad_speech_pad_ms', 200)     # 减少到 200ms
             
@@ -351,14 +780,13 @@ class ASRProcessor:
         
         print(f"Using prompt: {initial_prompt[:80]}...")
         
-        segments_generator, info = model.transcribe(
-            audio_path,
+        options = dict(
             language=language_code if language_code and language_code != "None" else None,
             task="transcribe",
             beam_size=5,                       # 保持 5，提高准确率
             best_of=5,                         # 多次采样取最佳
             temperature=0.0,                   # 确定性输出
-            word_timestamps=True,              # 词级时间戳
+            word_timestamps=need_word_timestamps,  # 词级时间戳（需要额外的对齐解码）
             condition_on_previous_text=True,   # 启用上下文，提高连贯性和术语一致性
             initial_prompt=initial_prompt,     # 专有名词提示，帮助识别 Wayland, QoL, OnReady 等
             vad_filter=getattr(self, 'use_vad', True),  # 确保 VAD 开启
@@ -370,47 +798,95 @@ class ASRProcessor:
             no_repeat_ngram_size=3,            # 禁止 3-gram 重复
         )
         
-        # 收集结果
-        segments = []
-        for segment in segments_generator:
-            seg_data = {
-                "start": segment.start,
-                "end": segment.end,
-                "text": segment.text.strip(),
-            }
+        if workers > 1:
+            segments = self._transcribe_faster_whisper_parallel(
+                audio, options, workers,
+                (model_name, device, compute_type, model_dir)
+            )
+            print(f"Transcription complete: {len(segments)} segments")
+        else:
+            segments_generator, info = self.model.transcribe(audio, **options)
             
-            # 添加词级时间戳
-            if segment.words:
-                seg_data["words"] = [
-                    {
-                        "word": word.word,
-                        "start": word.start,
-                        "end": word.end,
-                        "probability": word.probability
-                    }
-                    for word in segment.words
-                ]
+            # 收集结果
+            segments = _collect_faster_whisper_segments(segments_generator)
             
-            segments.append(seg_data)
+            print(f"Transcription complete: {len(segments)} segments")
+            print(f"Detected language: {info.language} ({info.language_probability:.2%})")
         
-        print(f"Transcription complete: {len(segments)} segments")
-        print(f"Detected language: {info.language} ({info.language_probability:.2%})")
+        if not need_word_timestamps:
+            return segments
         
         # 基于词级时间戳优化字幕分段
         return self._optimize_segments_by_words(segments)
 
+    def _transcribe_faster_whisper_parallel(self, audio, options, workers, model_args, max_chunk_s=30.0):
+        """
+        按 VAD 静音切分长音频，多进程并行转录后按顺序拼接
+        
+        Args:
+            audio: 16kHz 单声道音频数组
+            options: model.transcribe 的参数
+            workers: 工作进程数
+            model_args: (模型名, 设备, 计算类型, 模型目录)
+            max_chunk_s: 每个片段的最大时长（秒），默认与 Whisper 的 30 秒窗口一致
+            
+        Returns:
+            段落列表（时间戳已换算回整段音频）
+        """
+        from concurrent.futures import ProcessPoolExecutor
+        from itertools import repeat
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+        
+        vad_options = VadOptions(
+            threshold=getattr(self, 'vad_threshold', _DEFAULT_VAD_THRESHOLD),
+            min_silence_duration_ms=getattr(self, 'vad_min_silence_ms', 1000),
+            speech_pad_ms=getattr(self, 'vad_speech_pad_ms', 200)
+        )
+        speech = get_speech_timestamps(audio, vad_options)
+        chunks = _plan_speech_chunks(speech, len(audio), int(max_chunk_s * _SAMPLING_RATE))
+        if not chunks:
+            return []
+        
+        workers = min(workers, len(chunks))
+        cpu_threads = max(1, (os.cpu_count() or 1) // workers)
+        print(f"Parallel transcription: {len(chunks)} chunks, {workers} workers x {cpu_threads} threads")
+        
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_faster_whisper_worker,
+            initargs=(*model_args, cpu_threads)
+        ) as executor:
+            first_start, first_end = chunks[0]
+            first = executor.submit(
+                _transcribe_audio_chunk, audio[first_start:first_end], first_start / _SAMPLING_RATE, options
+            )
+            if options.get('language') is None:
+                # 自动检测语言时先转录第一个片段，用它检测到的语言统一转录其余片段，
+                # 避免各片段各自检测，出现同一视频混入不同语言的字幕
+                language = first.result()[1]
+                options = dict(options, language=language)
+            rest = executor.map(
+                _transcribe_audio_chunk,
+                [audio[start:end] for start, end in chunks[1:]],
+                [start / _SAMPLING_RATE for start, _ in chunks[1:]],
+                repeat(options)
+            )
+            results = [first.result(), *rest]
+        
+        segments = []
+        for chunk_segments, _ in results:
+            segments.extend(chunk_segments)
+        print(f"Detected language: {results[0][1]}")
+        return segments
+
     def _transcribe_elevenlabs(self, audio_path, language_code=None, diarize=False):
         """Transcribe using ElevenLabs Speech-to-Text."""
-        from elevenlabs.client import ElevenLabs
-        
         if not self.api_key:
             raise ValueError("ElevenLabs API key is required")
         
         print(f"Transcribing {audio_path} with ElevenLabs...")
-        client = ElevenLabs(api_key=self.api_key)
-        
         with open(audio_path, "rb") as audio_file:
-            transcription = client.speech_to_text.convert(
+            transcription = self.elevenlabs_client.speech_to_text.convert(
                 file=audio_file,
                 model_id="scribe_v1",
                 tag_audio_events=True,
@@ -426,51 +902,61 @@ class ASRProcessor:
         """Parse ElevenLabs transcription response to segments format."""
         segments = []
         
-        print(f"DEBUG: Transcription type: {type(transcription)}")
-        print(f"DEBUG: Transcription attributes: {dir(transcription)}")
+        if logger.isEnabledFor(logging.DEBUG):
+            # dir() 对 SDK 的 pydantic 对象开销不小，仅在开启调试日志时计算
+            logger.debug("Transcription type: %s", type(transcription))
+            logger.debug("Transcription attributes: %s", dir(transcription))
         
         # ElevenLabs API 返回的数据结构
         # 尝试访问不同的可能属性
         try:
             # 方法1: 检查是否有 words 属性（带时间戳的单词）
             if hasattr(transcription, 'words') and transcription.words:
-                print(f"DEBUG: Found {len(transcription.words)} words")
-                # 将单词组合成句子段落
-                current_segment = {"start": 0, "end": 0, "text": "", "words": []}
+                logger.debug("Found %d words", len(transcription.words))
+                # 同一响应中的单词对象结构相同，按第一个单词选定取值方式，循环内不再逐个探测属性
+                words = transcription.words
+                first = words[0]
+                get_text = attrgetter('text') if hasattr(first, 'text') else str
+                get_start = _first_attr_getter(first, ('start_time', 'start'))
+                get_end = _first_attr_getter(first, ('end_time', 'end'))
                 
-                for word in transcription.words:
-                    word_text = word.text if hasattr(word, 'text') else str(word)
-                    word_start = word.start_time if hasattr(word, 'start_time') else (word.start if hasattr(word, 'start') else 0)
-                    word_end = word.end_time if hasattr(word, 'end_time') else (word.end if hasattr(word, 'end') else 0)
+                # 将单词组合成句子段落（单词先收集到列表，成段时一次性拼接）
+                current_segment = {"start": 0, "end": 0, "words": []}
+                
+                for word in words:
+                    word_text = get_text(word)
                     
                     # 如果是新段落的开始或累积了足够的单词
-                    if not current_segment["text"]:
-                        current_segment["start"] = word_start
+                    if not current_segment["words"]:
+                        current_segment["start"] = get_start(word)
                     
-                    current_segment["text"] += word_text + " "
-                    current_segment["end"] = word_end
+                    current_segment["end"] = get_end(word)
                     current_segment["words"].append(word_text)
                     
-                    # 每10个单词或遇到句号创建一个新段落
-                    if len(current_segment["words"]) >= 10 or word_text.strip().endswith(('.', '!', '?', '。', '！', '？')):
+                    # 每10个单词或遇到句号创建一个新段落（末尾字符不是空白时无需 rstrip 分配新字符串）
+                    last_char = word_text[-1:]
+                    is_sentence_end = last_char in _SENTENCE_TERMINATORS or (
+                        last_char.isspace() and word_text.rstrip()[-1:] in _SENTENCE_TERMINATORS
+                    )
+                    if len(current_segment["words"]) >= 10 or is_sentence_end:
                         segments.append({
                             "start": current_segment["start"],
                             "end": current_segment["end"],
-                            "text": current_segment["text"].strip()
+                            "text": " ".join(current_segment["words"]).strip()
                         })
-                        current_segment = {"start": 0, "end": 0, "text": "", "words": []}
+                        current_segment = {"start": 0, "end": 0, "words": []}
                 
                 # 添加最后一个段落
-                if current_segment["text"]:
+                if current_segment["words"]:
                     segments.append({
                         "start": current_segment["start"],
                         "end": current_segment["end"],
-                        "text": current_segment["text"].strip()
+                        "text": " ".join(current_segment["words"]).strip()
                     })
             
             # 方法2: 检查是否有 segments 属性
             elif hasattr(transcription, 'segments') and transcription.segments:
-                print(f"DEBUG: Found {len(transcription.segments)} segments")
+                logger.debug("Found %d segments", len(transcription.segments))
                 for segment in transcription.segments:
                     segments.append({
                         "start": getattr(segment, 'start_time', getattr(segment, 'start', 0)),
@@ -480,28 +966,16 @@ class ASRProcessor:
             
             # 方法3: 只有文本，没有时间戳
             elif hasattr(transcription, 'text'):
-                print("DEBUG: Only text available, no timestamps")
+                logger.debug("Only text available, no timestamps")
                 full_text = transcription.text
                 # 按句子分割
-                sentences = self._split_into_sentences(full_text)
-                for i, sentence in enumerate(sentences):
-                    segments.append({
-                        "start": i * 5,  # 假设每句5秒
-                        "end": (i + 1) * 5,
-                        "text": sentence
-                    })
+                segments.extend(self._fake_timed_segments(full_text))
             
             # 方法4: 完全回退
             else:
-                print("DEBUG: Fallback to string conversion")
+                logger.debug("Fallback to string conversion")
                 text = str(transcription)
-                sentences = self._split_into_sentences(text)
-                for i, sentence in enumerate(sentences):
-                    segments.append({
-                        "start": i * 5,
-                        "end": (i + 1) * 5,
-                        "text": sentence
-                    })
+                segments.extend(self._fake_timed_segments(text))
         
         except Exception as e:
             print(f"ERROR parsing ElevenLabs response: {e}")
@@ -512,7 +986,7 @@ class ASRProcessor:
                 "text": str(transcription)
             })
         
-        print(f"DEBUG: Generated {len(segments)} segments")
+        logger.debug("Generated %d segments", len(segments))
         return segments
     
     def _transcribe_qwen(self, audio_path, language_code=None):
@@ -528,12 +1002,8 @@ class ASRProcessor:
             segments = self._transcribe_qwen_third_party(audio_path, language_code)
         else:
             # Original DashScope implementation
-            import dashscope
-            from dashscope.audio.qwen_asr import QwenTranscription
-            
             # Set API configuration
-            dashscope.api_key = self.api_key
-            dashscope.base_http_api_url = self.api_url
+            self._configure_dashscope()
             
             # Check if audio_path is a URL or local file
             if audio_path.startswith('http://') or audio_path.startswith('https://'):
@@ -548,8 +1018,6 @@ class ASRProcessor:
     
     def _transcribe_qwen_third_party(self, audio_path, language_code=None):
         """Transcribe using third-party API (OpenAI-compatible)."""
-        import requests
-        
         print(f"Using third-party API: {self.api_url}")
         
         # Prepare the file
@@ -560,25 +1028,24 @@ class ASRProcessor:
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
         # Prepare request
-        url = self.api_url
-        if not url.endswith('/transcriptions'):
-            if not url.endswith('/'):
-                url += '/'
-            url += 'v1/audio/transcriptions'
+        url = _third_party_endpoint(self.api_url)
         
         headers = {
-            'Accept': 'application/json',
             'Authorization': f'Bearer {self.api_key}'
         }
         
         # Extract model name (remove description in parentheses)
-        model_name = self.model_size.split(' ')[0] if ' ' in self.model_size else self.model_size
+        model_name = _third_party_model_name(self.model_size)
+        
+        # requests-toolbelt 可选：流式构造 multipart 请求体，不必把整个音频读入内存
+        try:
+            from requests_toolbelt import MultipartEncoder
+        except ImportError:
+            MultipartEncoder = None
         
         # Prepare file upload
         with open(audio_path, 'rb') as audio_file:
-            files = {
-                'file': (os.path.basename(audio_path), audio_file, 'application/octet-stream')
-            }
+            file_field = (os.path.basename(audio_path), audio_file, 'application/octet-stream')
             
             # Prepare form data
             data = {
@@ -591,7 +1058,12 @@ class ASRProcessor:
             
             print(f"Uploading file to: {url}")
             print(f"Model: {model_name}")
-            response = requests.post(url, headers=headers, data=data, files=files, timeout=300)
+            if MultipartEncoder is not None:
+                encoder = MultipartEncoder(fields={**data, 'file': file_field})
+                headers['Content-Type'] = encoder.content_type
+                response = self.http_session.post(url, headers=headers, data=encoder, timeout=300)
+            else:
+                response = self.http_session.post(url, headers=headers, data=data, files={'file': file_field}, timeout=300)
         
         print(f"Response status: {response.status_code}")
         
@@ -599,7 +1071,7 @@ class ASRProcessor:
             raise RuntimeError(f"API request failed ({response.status_code}): {response.text}")
         
         # Parse response
-        result = response.json()
+        result = _json_loads(response.content)
         print(f"Transcription result: {result.keys() if isinstance(result, dict) else type(result)}")
         
         # Convert to segments format
@@ -622,13 +1094,7 @@ class ASRProcessor:
             elif 'text' in result:
                 # Only text, no timestamps
                 text = result['text']
-                sentences = self._split_into_sentences(text)
-                for i, sentence in enumerate(sentences):
-                    segments.append({
-                        'start': i * 5,
-                        'end': (i + 1) * 5,
-                        'text': sentence
-                    })
+                segments.extend(self._fake_timed_segments(text))
             else:
                 # Unknown format
                 segments.append({
@@ -647,9 +1113,37 @@ class ASRProcessor:
         print(f"Generated {len(segments)} segments")
         return segments
     
+    def _wait_qwen_task(self, task_id, initial_delay=0.5, max_delay=5.0):
+        """
+        轮询等待 Qwen ASR 任务结束（指数退避）
+        
+        被中断（Ctrl+C）时取消云端任务后再抛出，避免任务继续运行计费
+        
+        Returns:
+            最后一次查询的任务结果
+        """
+        import time
+        from dashscope.audio.qwen_asr import QwenTranscription
+        
+        delay = initial_delay
+        try:
+            while True:
+                task_result = QwenTranscription.fetch(task=task_id)
+                if task_result.status_code != 200:
+                    return task_result
+                if getattr(task_result.output, 'task_status', None) in ('SUCCEEDED', 'FAILED', 'CANCELED', 'UNKNOWN'):
+                    return task_result
+                time.sleep(delay)
+                delay = min(delay * 1.5, max_delay)
+        except KeyboardInterrupt:
+            try:
+                QwenTranscription.cancel(task=task_id)
+            except Exception:
+                pass
+            raise
+    
     def _transcribe_qwen_with_url(self, file_url, language_code=None):
         """Transcribe using Qwen ASR with a direct URL."""
-        import dashscope
         from dashscope.audio.qwen_asr import QwenTranscription
         
         try:
@@ -680,7 +1174,7 @@ class ASRProcessor:
             
             # Wait for task completion
             print("Waiting for transcription to complete...")
-            task_result = QwenTranscription.wait(task=task_id)
+            task_result = self._wait_qwen_task(task_id)
             
             print(f"Transcription completed with status: {task_result.status_code}")
             
@@ -698,13 +1192,11 @@ class ASRProcessor:
     
     def _transcribe_qwen_async(self, audio_path, language_code=None):
         """Use async method with local HTTP server."""
-        import dashscope
         from dashscope.audio.qwen_asr import QwenTranscription
         import threading
-        from http.server import HTTPServer, SimpleHTTPRequestHandler
+        from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
         import socket
-        import time
-        from urllib.parse import quote
+        from urllib.parse import quote, unquote
         
         # Find available port
         def find_free_port():
@@ -716,24 +1208,42 @@ class ASRProcessor:
         
         port = find_free_port()
         
-        # Get file directory and name
-        file_dir = os.path.dirname(os.path.abspath(audio_path))
+        # Get file path, name and size
+        file_path = os.path.abspath(audio_path)
         file_name = os.path.basename(audio_path)
-        
-        # Start local HTTP server
-        class Handler(SimpleHTTPRequestHandler):
-            def __init__(self, *args, **kwargs):
-                super().__init__(*args, directory=file_dir, **kwargs)
+        file_size = os.path.getsize(file_path)
+        
+        # Start local HTTP server: 只提供这一个文件，由内核 sendfile 直接发送（不支持的平台自动回退为普通发送）
+        class Handler(BaseHTTPRequestHandler):
+            def _send_file_headers(self):
+                if unquote(self.path.split('?', 1)[0]) != '/' + file_name:
+                    self.send_error(404)
+                    return False
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/octet-stream')
+                self.send_header('Content-Length', str(file_size))
+                self.end_headers()
+                return True
+            
+            def do_HEAD(self):
+                self._send_file_headers()
+            
+            def do_GET(self):
+                if not self._send_file_headers():
+                    return
+                self.wfile.flush()
+                with open(file_path, 'rb') as f:
+                    self.connection.sendfile(f)
             
             def log_message(self, format, *args):
-                print(f"HTTP Server: {format % args}")
+                pass
         
-        server = HTTPServer(('0.0.0.0', port), Handler)
+        server = ThreadingHTTPServer(('0.0.0.0', port), Handler)
+        server.daemon_threads = True
         server_thread = threading.Thread(target=server.serve_forever, daemon=True)
         server_thread.start()
         
-        # Wait for server to start
-        time.sleep(0.5)
+        # ThreadingHTTPServer 构造时已完成 bind/listen，无需等待启动
         
         try:
             # URL encode the filename to handle spaces and special characters
@@ -741,12 +1251,12 @@ class ASRProcessor:
             file_url = f"http://127.0.0.1:{port}/{encoded_filename}"
             print(f"Serving file at: {file_url}")
             
-            # Test if file is accessible
+            # Test if file is accessible: HEAD 请求只取响应头，不下载整个文件
             import urllib.request
             try:
-                with urllib.request.urlopen(file_url, timeout=5) as response:
-                    file_size = len(response.read())
-                    print(f"File accessible, size: {file_size} bytes")
+                request = urllib.request.Request(file_url, method='HEAD')
+                with urllib.request.urlopen(request, timeout=5) as response:
+                    print(f"File accessible, size: {response.headers.get('Content-Length')} bytes")
             except Exception as e:
                 print(f"Warning: Could not verify file access: {e}")
                 # Try without encoding
@@ -791,7 +1301,7 @@ class ASRProcessor:
             
             # Wait for task completion
             print("Waiting for transcription to complete...")
-            task_result = QwenTranscription.wait(task=task_id)
+            task_result = self._wait_qwen_task(task_id)
             
             print(f"Transcription completed with status: {task_result.status_code}")
             
@@ -826,13 +1336,14 @@ class ASRProcessor:
             # Stop server
             print("Shutting down HTTP server...")
             server.shutdown()
+            server.server_close()
     
     def _parse_qwen_response(self, task_result):
         """Parse Qwen ASR response to segments format."""
         segments = []
         
-        print(f"DEBUG: Qwen result status: {task_result.status_code}")
-        print(f"DEBUG: Qwen result output: {task_result.output}")
+        logger.debug("Qwen result status: %s", task_result.status_code)
+        logger.debug("Qwen result output: %s", task_result.output)
         
         try:
             # Qwen ASR returns transcription with timestamps
@@ -855,24 +1366,12 @@ class ASRProcessor:
                         # Fallback to full text
                         elif hasattr(trans_result, 'text'):
                             text = trans_result.text
-                            sentences = self._split_into_sentences(text)
-                            for i, sentence in enumerate(sentences):
-                                segments.append({
-                                    "start": i * 5,
-                                    "end": (i + 1) * 5,
-                                    "text": sentence
-                                })
+                            segments.extend(self._fake_timed_segments(text))
             
             # Fallback: try to get text directly
             elif hasattr(task_result.output, 'text'):
                 text = task_result.output.text
-                sentences = self._split_into_sentences(text)
-                for i, sentence in enumerate(sentences):
-                    segments.append({
-                        "start": i * 5,
-                        "end": (i + 1) * 5,
-                        "text": sentence
-                    })
+                segments.extend(self._fake_timed_segments(text))
             
             # Last resort
             else:
@@ -891,22 +1390,34 @@ class ASRProcessor:
                 "text": str(task_result.output)
             })
         
-        print(f"DEBUG: Generated {len(segments)} segments from Qwen")
+        logger.debug("Generated %d segments from Qwen", len(segments))
         return segments
     
+    def _fake_timed_segments(self, text):
+        """
+        没有时间戳时按句子生成段落（假设每句 5 秒）
+        
+        Yields:
+            {"start", "end", "text"} 段落
+        """
+        # 直接从句子匹配逐个生成段落，不先构造句子列表
+        i = 0
+        for match in _SENTENCE_RE.finditer(text):
+            sentence = match.group().strip()
+            if sentence:
+                yield {"start": i * 5, "end": (i + 1) * 5, "text": sentence}
+                i += 1
+        if i == 0:
+            yield {"start": 0, "end": 5, "text": text}
+    
     def _split_into_sentences(self, text):
         """将文本分割成句子"""
-        import re
-        # 按句号、问号、感叹号分割
-        sentences = re.split(r'([.!?。！？]+)', text)
+        # 按句号、问号、感叹号分割（句末标点保留在句子中），单次扫描
         result = []
-        for i in range(0, len(sentences)-1, 2):
-            sentence = (sentences[i] + (sentences[i+1] if i+1 < len(sentences) else '')).strip()
+        for match in _SENTENCE_RE.finditer(text):
+            sentence = match.group().strip()
             if sentence:
                 result.append(sentence)
-        # 处理最后一个句子（如果没有标点）
-        if len(sentences) % 2 == 1 and sentences[-1].strip():
-            result.append(sentences[-1].strip())
         return result if result else [text]
     
     def _optimize_segments_by_words(self, segments, pause_threshold=None, max_words_per_segment=None):
@@ -942,56 +1453,35 @@ class ASRProcessor:
                 })
                 continue
             
-            # 基于停顿和词数重新分段
-            current_segment = {
-                "start": None,
-                "end": None,
-                "words": []
-            }
+            # 基于停顿和词数重新分段（当前段落用局部变量维护，不再每个词读写字典）
+            seg_words = []
+            seg_start = seg_end = None
             
-            for i, word_info in enumerate(words):
-                word = word_info.get("word", "")
+            for word_info in words:
                 word_start = word_info.get("start", 0)
-                word_end = word_info.get("end", 0)
-                
-                # 检查是否需要开始新段落（在添加当前词之前）
-                start_new_segment = False
                 
-                if current_segment["start"] is None:
-                    # 第一个词，不分段
-                    start_new_segment = False
-                elif len(current_segment["words"]) >= max_words_per_segment:
-                    # 达到最大词数，强制分段
-                    start_new_segment = True
-                elif word_start - current_segment["end"] > pause_threshold:
-                    # 停顿超过阈值，分段
-                    start_new_segment = True
-                
-                if start_new_segment and current_segment["words"]:
-                    # 保存当前段落
+                # 在添加当前词之前检查：达到最大词数，或停顿超过阈值，则保存当前段落
+                if seg_words and (len(seg_words) >= max_words_per_segment
+                                  or word_start - seg_end > pause_threshold):
                     optimized.append({
-                        "start": current_segment["start"],
-                        "end": current_segment["end"],
-                        "text": "".join(current_segment["words"]).strip()
+                        "start": seg_start,
+                        "end": seg_end,
+                        "text": "".join(seg_words).strip()
                     })
-                    current_segment = {
-                        "start": None,
-                        "end": None,
-                        "words": []
-                    }
+                    seg_words = []
                 
                 # 添加当前词
-                if current_segment["start"] is None:
-                    current_segment["start"] = word_start
-                current_segment["end"] = word_end
-                current_segment["words"].append(word)
+                if not seg_words:
+                    seg_start = word_start
+                seg_end = word_info.get("end", 0)
+                seg_words.append(word_info.get("word", ""))
             
             # 保存最后一个段落
-            if current_segment["words"]:
+            if seg_words:
                 optimized.append({
-                    "start": current_segment["start"],
-                    "end": current_segment["end"],
-                    "text": "".join(current_segment["words"]).strip()
+                    "start": seg_start,
+                    "end": seg_end,
+                    "text": "".join(seg_words).strip()
                 })
         
         # 应用后处理优化
@@ -1034,7 +1524,7 @@ class ASRProcessor:
             if len(sentences) > 1:
                 # 重组句子（保留标点）
                 current = ""
-                for i, part in enumerate(sentences):
+                for part in sentences:
                     if part in '.!?':
                         current += part
                         if current.strip():
@@ -1142,7 +1632,8 @@ class ASRProcessor:
         except Exception as e:
             print(f"Warning: Quality monitoring failed: {e}")
 
-    def optimize_with_ai(self, segments, api_key, api_url, model, optimize_level="medium", progress_callback=None):
+    def optimize_with_ai(self, segments, api_key, api_url, model, optimize_level="medium", progress_callback=None,
+                         use_cache=True, prompt_cache=True):
         """
         使用 AI 优化字幕的断句和流畅度
         
@@ -1153,12 +1644,14 @@ class ASRProcessor:
             model: 模型名称
             optimize_level: 优化强度 "light"(轻度), "medium"(中度), "heavy"(重度)
             progress_callback: 进度回调函数
+            use_cache: 是否使用磁盘缓存的 AI 优化结果（重复处理同一视频时跳过请求）
+            prompt_cache: 是否让服务端缓存系统提示词前缀（Claude 模型显式标记 cache_control，
+                OpenAI/DeepSeek 等对完全相同的前缀自动缓存）
             
         Returns:
             优化后的 segments 列表
         """
-        import requests
-        import re
+        from concurrent.futures import ThreadPoolExecutor, as_completed
         
         if not segments:
             return segments
@@ -1243,18 +1736,45 @@ class ASRProcessor:
         
         # 分批处理（每批20条）
         batch_size = 20
-        all_optimized = []
-        total_batches = (len(input_lines) + batch_size - 1) // batch_size
+        batches = [input_lines[i:i + batch_size] for i in range(0, len(input_lines), batch_size)]
+        total_batches = len(batches)
         
-        for batch_idx in range(total_batches):
-            start_idx = batch_idx * batch_size
-            end_idx = min(start_idx + batch_size, len(input_lines))
-            batch_lines = input_lines[start_idx:end_idx]
-            
-            if progress_callback:
-                progress_callback(f"AI优化中... 批次 {batch_idx + 1}/{total_batches}")
+        headers = {
+            "Content-Type": "application/json",
+            "Authorization": f"Bearer {api_key}"
+        }
+        session = self.ai_http_session
+        cache = self._ai_cache if use_cache else None
+        # 系统提示词在所有批次中逐字节相同，每批变化的内容（条数、字幕）都只放在 user 消息里
+        cache_control = prompt_cache and _supports_cache_control(api_url, model)
+        
+        # 并发发送各批次，结果按批次序号放回，保持字幕顺序
+        results = [None] * total_batches
+        with ThreadPoolExecutor(max_workers=max(1, min(self.ai_max_workers, total_batches))) as executor:
+            futures = {
+                executor.submit(self._optimize_batch, session, api_url, headers, model, system_prompt, batch_lines, cache,
+                                cache_control): batch_idx
+                for batch_idx, batch_lines in enumerate(batches)
+            }
             
-            user_message = f"""请优化以下 {len(batch_lines)} 条英文字幕（不要翻译，保持英文）：
+            for done, future in enumerate(as_completed(futures), 1):
+                results[futures[future]] = future.result()
+                if progress_callback:
+                    progress_callback(f"AI优化中... 批次 {done}/{total_batches}")
+        
+        all_optimized = [seg for batch_result in results for seg in batch_result]
+        
+        if progress_callback:
+            progress_callback(f"AI优化完成，共 {len(all_optimized)} 条字幕")
+        
+        return all_optimized if all_optimized else segments
+    
+    def _optimize_batch(self, session, api_url, headers, model, system_prompt, batch_lines, cache=None,
+                        cache_control=False):
+        """发送一批字幕给 AI 优化，失败时保留原始数据；成功解析的结果写入 cache"""
+        import hashlib
+        
+        user_message = f"""请优化以下 {len(batch_lines)} 条英文字幕（不要翻译，保持英文）：
 
 {chr(10).join(batch_lines)}
 
@@ -1264,65 +1784,79 @@ class ASRProcessor:
 - 可以合并或拆分条目，但时间必须连续
 - 只输出优化结果，不要其他说明
 - 重要：保持英文原文，不要翻译！"""
-            
-            headers = {
-                "Content-Type": "application/json",
-                "Authorization": f"Bearer {api_key}"
-            }
-            
-            payload = {
-                "model": model,
-                "messages": [
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_message}
-                ],
-                "temperature": 0.3
-            }
-            
-            try:
-                response = requests.post(api_url, headers=headers, json=payload, timeout=120)
-                
-                if response.status_code != 200:
-                    print(f"AI优化请求失败 ({response.status_code}): {response.text}")
-                    # 失败时保留原始数据
-                    for line in batch_lines:
-                        parts = line.split('|', 3)
-                        if len(parts) == 4:
-                            all_optimized.append({
-                                "start": self._parse_timestamp(parts[1]),
-                                "end": self._parse_timestamp(parts[2]),
-                                "text": parts[3]
-                            })
-                    continue
-                
-                result = response.json()
-                content = result['choices'][0]['message']['content']
-                
-                # 解析优化结果
-                optimized_batch = self._parse_ai_optimized_response(content, batch_lines)
-                all_optimized.extend(optimized_batch)
-                
-            except Exception as e:
-                print(f"AI优化出错: {e}")
-                # 失败时保留原始数据
-                for line in batch_lines:
-                    parts = line.split('|', 3)
-                    if len(parts) == 4:
-                        all_optimized.append({
-                            "start": self._parse_timestamp(parts[1]),
-                            "end": self._parse_timestamp(parts[2]),
-                            "text": parts[3]
-                        })
         
-        if progress_callback:
-            progress_callback(f"AI优化完成，共 {len(all_optimized)} 条字幕")
+        if cache_control:
+            system_content = [{"type": "text", "text": system_prompt, "cache_control": {"type": "ephemeral"}}]
+        else:
+            system_content = system_prompt
+        
+        payload = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system_content},
+                {"role": "user", "content": user_message}
+            ],
+            "temperature": 0.3
+        }
         
-        return all_optimized if all_optimized else segments
+        # 提示词已包含优化强度，key 覆盖 (模型, 优化强度, 字幕批次)
+        cache_key = text_key = None
+        if cache is not None:
+            cache_key = hashlib.sha256(f"{model}|{system_prompt}|{user_message}".encode('utf-8')).hexdigest()
+            cached = cache.get(cache_key)
+            if cached is not None:
+                return cached
+            
+            # 时间轴有抖动但文本相同（忽略空白和大小写）时，复用缓存结果并按当前批次的时间范围线性伸缩
+            original = self._ai_lines_to_segments(batch_lines)
+            normalized_text = "\n".join(" ".join(seg["text"].split()).lower() for seg in original)
+            text_key = hashlib.sha256(f"{model}|{system_prompt}|{normalized_text}".encode('utf-8')).hexdigest()
+            cached = cache.get(text_key)
+            if cached is not None and original:
+                return _stretch_segments(cached["segments"], cached["span"],
+                                         (original[0]["start"], original[-1]["end"]))
+        
+        try:
+            response = session.post(api_url, headers=headers, json=payload, timeout=120)
+            
+            if response.status_code != 200:
+                print(f"AI优化请求失败 ({response.status_code}): {response.text}")
+                # 失败时保留原始数据
+                return self._ai_lines_to_segments(batch_lines)
+            
+            result = response.json()
+            content = result['choices'][0]['message']['content']
+            
+            # 解析优化结果（解析失败时不写缓存，回退到原始数据）
+            optimized = self._parse_ai_optimized_response(content, [])
+            if not optimized:
+                return self._ai_lines_to_segments(batch_lines)
+            if cache_key is not None:
+                cache.put(cache_key, optimized)
+            if text_key is not None and original:
+                cache.put(text_key, {"segments": optimized, "span": [original[0]["start"], original[-1]["end"]]})
+            return optimized
+            
+        except Exception as e:
+            print(f"AI优化出错: {e}")
+            # 失败时保留原始数据
+            return self._ai_lines_to_segments(batch_lines)
+    
+    def _ai_lines_to_segments(self, lines):
+        """将 "序号|开始|结束|文本" 格式的输入行还原为 segments"""
+        segments = []
+        for line in lines:
+            parts = line.split('|', 3)
+            if len(parts) == 4:
+                segments.append({
+                    "start": self._parse_timestamp(parts[1]),
+                    "end": self._parse_timestamp(parts[2]),
+                    "text": parts[3]
+                })
+        return segments
     
     def _parse_ai_optimized_response(self, content, original_lines):
         """解析AI优化后的响应"""
-        import re
-        
         optimized = []
         lines = content.strip().split('\n')
         
@@ -1332,7 +1866,7 @@ class ASRProcessor:
                 continue
             
             # 匹配格式: 序号|时间|时间|文本
-            match = re.match(r'^(\d+)\|([^|]+)\|([^|]+)\|(.+)$', line)
+            match = _AI_LINE_RE.match(line)
             if match:
                 try:
                     start_time = self._parse_timestamp(match.group(2).strip())
@@ -1352,33 +1886,30 @@ class ASRProcessor:
         # 如果解析失败，返回原始数据
         if not optimized:
             print("AI响应解析失败，使用原始字幕")
-            for line in original_lines:
-                parts = line.split('|', 3)
-                if len(parts) == 4:
-                    optimized.append({
-                        "start": self._parse_timestamp(parts[1]),
-                        "end": self._parse_timestamp(parts[2]),
-                        "text": parts[3]
-                    })
+            optimized = self._ai_lines_to_segments(original_lines)
         
         return optimized
     
     def _parse_timestamp(self, ts_str):
         """解析 SRT 时间戳为秒数"""
-        import re
-        
         ts_str = ts_str.strip()
+        # 快速路径：标准的 HH:MM:SS,mmm 直接拆分，不走正则（格式不符时回退到正则）
+        try:
+            hms, millis = ts_str.replace('.', ',').split(',')
+            hours, minutes, seconds = hms.split(':')
+            if (hours + minutes + seconds + millis).isdigit():
+                return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000.0
+        except ValueError:
+            pass
+        
         # 匹配 HH:MM:SS,mmm 或 HH:MM:SS.mmm
-        match = re.match(r'(\d+):(\d+):(\d+)[,.](\d+)', ts_str)
+        match = _TS_HMS_RE.match(ts_str)
         if match:
-            hours = int(match.group(1))
-            minutes = int(match.group(2))
-            seconds = int(match.group(3))
-            millis = int(match.group(4))
-            return hours * 3600 + minutes * 60 + seconds + millis / 1000.0
+            hours, minutes, seconds, millis = match.groups()
+            return int(hours) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000.0
         
         # 尝试简单格式 MM:SS,mmm
-        match = re.match(r'(\d+):(\d+)[,.](\d+)', ts_str)
+        match = _TS_MS_RE.match(ts_str)
         if match:
             minutes = int(match.group(1))
             seconds = int(match.group(2))
@@ -1391,30 +1922,22 @@ class ASRProcessor:
         """
         Save transcription segments to an SRT file.
         """
+        # 先拼出整个文件内容，再一次写入
+        content = "".join(
+            f"{i}\n{self._format_timestamp(segment['start'])} --> {self._format_timestamp(segment['end'])}\n"
+            f"{segment['text'].strip()}\n\n"
+            for i, segment in enumerate(segments, 1)
+        )
         with open(output_path, "w", encoding="utf-8") as f:
-            for i, segment in enumerate(segments):
-                start = self._format_timestamp(segment["start"])
-                end = self._format_timestamp(segment["end"])
-                text = segment["text"].strip()
-                
-                f.write(f"{i + 1}\n")
-                f.write(f"{start} --> {end}\n")
-                f.write(f"{text}\n\n")
+            f.write(content)
         print(f"SRT saved to {output_path}")
 
     def _format_timestamp(self, seconds):
         """
         Format seconds to SRT timestamp format (HH:MM:SS,mmm).
         """
-        td = datetime.timedelta(seconds=seconds)
-        # Handle milliseconds
-        total_seconds = int(td.total_seconds())
-        hours = total_seconds // 3600
-        minutes = (total_seconds % 3600) // 60
-        secs = total_seconds % 60
-        millis = int((td.total_seconds() - total_seconds) * 1000)
-        
-        return f"{hours:02}:{minutes:02}:{secs:02},{millis:03}"
+        # 整数毫秒运算（四舍五入），避免浮点截断导致的 1 毫秒误差
+        return _format_srt_ms(max(0, int(seconds * 1000 + 0.5)))
 
 if __name__ == "__main__":
     # Test
@@ -1,6 +1,10 @@
 import os
 import subprocess
 import threading
+from concurrent.futures import Future
+
+# Demucs 预训练模型的采样率（模型未加载完时按此提取音频，不一致时 separate_tensor 会重采样）
+_DEMUCS_SAMPLE_RATE = 44100
 
 
 class AudioExtractor:
@@ -34,13 +38,37 @@ class AudioExtractor:
             output_path
         ]
 
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         return True
 
-    def extract_silent_video(self, video_path, output_path, progress_callback=None):
+    def read_audio_pcm(self, video_path, sample_rate, channels=2):
         """
-        从视频中移除音频，生成无声视频
+        通过管道读取视频音轨为 float32 PCM，不写临时文件
+        
+        Returns:
+            numpy.ndarray: 形状为 (channels, samples) 的 float32 数组
         """
+        import numpy as np
+
+        if not os.path.exists(video_path):
+            raise FileNotFoundError(f"Video file not found: {video_path}")
+
+        command = [
+            self.ffmpeg_path,
+            "-i", video_path,
+            "-vn",
+            "-f", "f32le",
+            "-acodec", "pcm_f32le",
+            "-ac", str(channels),
+            "-ar", str(sample_rate),
+            "-"
+        ]
+
+        result = subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        return np.frombuffer(result.stdout, dtype=np.float32).reshape(-1, channels).T.copy()
+
+    def _silent_video_command(self, video_path, output_path):
+        """检查输入、创建输出目录，返回生成无声视频的 ffmpeg 命令"""
         if not os.path.exists(video_path):
             raise FileNotFoundError(f"Video file not found: {video_path}")
 
@@ -48,34 +76,61 @@ class AudioExtractor:
         if output_dir:
             os.makedirs(output_dir, exist_ok=True)
 
-        command = [
+        return [
             self.ffmpeg_path,
             "-y",
             "-i", video_path,
+            "-map", "0:V:0",  # 只输出第一路真正的视频流（大写 V 跳过封面等附加图片），其余流不做处理
             "-an",  # 移除音频
             "-c:v", "copy",  # 直接复制视频流，不重新编码
             output_path
         ]
 
-        subprocess.run(command, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    def extract_silent_video(self, video_path, output_path, progress_callback=None):
+        """
+        从视频中移除音频，生成无声视频
+        """
+        command = self._silent_video_command(video_path, output_path)
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
         if progress_callback:
             progress_callback("无声视频生成完成")
         return True
 
+    def start_silent_video(self, video_path, output_path):
+        """
+        在后台启动无声视频生成，立即返回 Popen，由调用方 wait()
+        
+        输出不读取，直接丢弃（避免管道写满阻塞 ffmpeg）
+        """
+        command = self._silent_video_command(video_path, output_path)
+        return subprocess.Popen(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
 
 class DemucsProcessor:
     """使用 Demucs 进行人声分离"""
     
-    def __init__(self, model="htdemucs", device="cuda"):
+    def __init__(self, model="htdemucs", device="cuda", segment_seconds=None, overlap=0.25, fp16=True,
+                 float_output=False):
         """
         初始化 Demucs 处理器
         
         Args:
             model: 模型名称 (htdemucs, htdemucs_ft, mdx_extra 等)
             device: 设备 (cuda 或 cpu)
+            segment_seconds: 分块推理的块长（秒），None 使用模型训练时的长度
+                （htdemucs 不能超过其训练长度）
+            overlap: 相邻块的重叠比例
+            fp16: CUDA 上是否用 FP16 混合精度推理（更快、更省显存，音质差异听不出）
+            float_output: 输出 32 位浮点 WAV；默认输出 16 位 PCM（文件大小减半）
         """
         self.model = model
         self.device = device
+        self.segment_seconds = segment_seconds
+        self.overlap = overlap
+        self.fp16 = fp16
+        self.float_output = float_output
+        self._model = None  # 已加载的模型（load_model 首次调用时加载）
+        self._load_lock = threading.Lock()  # 后台预加载和推理前的加载共用，保证只加载一次
     
     def separate(self, audio_path, output_dir, progress_callback=None,
                  output_vocals=True, output_accompaniment=True):
@@ -95,14 +150,58 @@ class DemucsProcessor:
         if not os.path.exists(audio_path):
             raise FileNotFoundError(f"Audio file not found: {audio_path}")
         
-        os.makedirs(output_dir, exist_ok=True)
+        try:
+            import torchaudio
+        except ImportError as e:
+            raise ImportError(f"请安装 demucs: pip install demucs\n{str(e)}")
+        
+        # 加载音频
+        wav, sr = torchaudio.load(audio_path)
+        
+        base_name = os.path.splitext(os.path.basename(audio_path))[0]
+        # 移除 _temp 后缀（如果有）
+        if base_name.endswith("_temp"):
+            base_name = base_name[:-5]
+        
+        return self.separate_tensor(wav, sr, output_dir, base_name, progress_callback,
+                                    output_vocals=output_vocals, output_accompaniment=output_accompaniment)
+    
+    def load_model(self, progress_callback=None):
+        """
+        加载 Demucs 模型（只加载一次）
         
+        Returns:
+            已加载到设备上的模型
+        """
+        with self._load_lock:
+            if self._model is None:
+                self._model = self._load_model(progress_callback)
+            return self._model
+    
+    def preload_async(self, progress_callback=None):
+        """
+        在后台线程加载模型，与音频提取等工作并行
+        
+        Returns:
+            Future: 完成时结果为模型；之后的 load_model() 会等待预加载完成并复用
+        """
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(self.load_model(progress_callback))
+            except BaseException as e:
+                future.set_exception(e)
+        
+        threading.Thread(target=run, daemon=True).start()
+        return future
+    
+    def _load_model(self, progress_callback=None):
         if progress_callback:
             progress_callback("正在加载 Demucs 模型...")
         
         try:
             import torch
-            import torchaudio
             
             # 确保 soundfile 后端可用
             try:
@@ -111,7 +210,6 @@ class DemucsProcessor:
                 raise ImportError("请安装 soundfile: pip install soundfile")
             
             from demucs.pretrained import get_model
-            from demucs.apply import apply_model
             
             # 检测设备
             if self.device == "cuda" and not torch.cuda.is_available():
@@ -119,28 +217,59 @@ class DemucsProcessor:
                 if progress_callback:
                     progress_callback("CUDA 不可用，使用 CPU 处理")
             
-            device = torch.device(self.device)
-            
             # 加载模型
             model = get_model(self.model)
-            model.to(device)
+            model.to(torch.device(self.device))
             model.eval()
+        except ImportError as e:
+            raise ImportError(f"请安装 demucs: pip install demucs\n{str(e)}")
+        except Exception as e:
+            raise Exception(f"Demucs 处理失败: {str(e)}")
+        
+        if progress_callback:
+            progress_callback(f"模型加载完成，使用设备: {self.device}")
+        
+        return model
+    
+    def separate_tensor(self, wav, sr, output_dir, base_name, progress_callback=None,
+                        output_vocals=True, output_accompaniment=True):
+        """
+        分离内存中的音频为人声和伴奏
+        
+        Args:
+            wav: 形状为 (channels, samples) 的音频（torch.Tensor 或 numpy 数组）
+            sr: 采样率
+            output_dir: 输出目录
+            base_name: 输出文件名前缀
+            progress_callback: 进度回调函数
+            output_vocals: 是否输出人声
+            output_accompaniment: 是否输出伴奏
             
-            if progress_callback:
-                progress_callback(f"模型加载完成，使用设备: {self.device}")
-                progress_callback("正在处理音频...")
+        Returns:
+            dict: 包含 vocals 和 accompaniment 路径的字典
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        
+        model = self.load_model(progress_callback)
+        
+        if progress_callback:
+            progress_callback("正在处理音频...")
+        
+        try:
+            import torch
+            import torchaudio
+            from demucs.apply import apply_model
             
-            # 加载音频
-            wav, sr = torchaudio.load(audio_path)
+            device = torch.device(self.device)
+            
+            if not isinstance(wav, torch.Tensor):
+                wav = torch.from_numpy(wav)
             
             # 如果采样率不匹配，重采样
             if sr != model.samplerate:
                 wav = torchaudio.functional.resample(wav, sr, model.samplerate)
                 sr = model.samplerate
             
-            # 转换为模型需要的格式
-            wav = wav.to(device)
-            
             # 确保是立体声
             if wav.shape[0] == 1:
                 wav = wav.repeat(2, 1)
@@ -150,40 +279,54 @@ class DemucsProcessor:
             # 添加 batch 维度
             wav = wav.unsqueeze(0)
             
-            # 应用模型
-            with torch.no_grad():
-                sources = apply_model(model, wav, device=device, progress=True)
+            # 应用模型：整轨音频留在内存，apply_model 分块送到设备上推理，
+            # 输出也在内存中拼接，显存占用只与块长有关，与音频总长无关
+            # CUDA 上用 FP16 autocast；不支持时回退到 FP32 重新推理
+            use_fp16 = self.fp16 and device.type == "cuda"
+            try:
+                with torch.no_grad(), torch.autocast("cuda", dtype=torch.float16, enabled=use_fp16):
+                    sources = apply_model(model, wav, device=device, progress=True, split=True,
+                                          segment=self.segment_seconds, overlap=self.overlap)
+            except (RuntimeError, TypeError):
+                if not use_fp16:
+                    raise
+                if progress_callback:
+                    progress_callback("FP16 推理失败，改用 FP32")
+                torch.cuda.empty_cache()
+                with torch.no_grad():
+                    sources = apply_model(model, wav, device=device, progress=True, split=True,
+                                          segment=self.segment_seconds, overlap=self.overlap)
+            sources = sources.float()
             
             # 获取源名称
             source_names = model.sources
             
             # 保存分离的音频
-            base_name = os.path.splitext(os.path.basename(audio_path))[0]
-            # 移除 _temp 后缀（如果有）
-            if base_name.endswith("_temp"):
-                base_name = base_name[:-5]
             results = {}
             
             # 保存人声
             if output_vocals and "vocals" in source_names:
                 vocals_idx = source_names.index("vocals")
-                vocals = sources[0, vocals_idx].cpu()
                 vocals_path = os.path.join(output_dir, f"{base_name}_vocals.wav")
-                torchaudio.save(vocals_path, vocals, sr)
+                self._save_wav(vocals_path, sources[0, vocals_idx], sr)
                 results["vocals"] = vocals_path
                 if progress_callback:
                     progress_callback("已保存: vocals (人声)")
             
-            # 合并非人声部分作为伴奏
+            # 合并非人声部分作为伴奏（就地累加，只多占一份音轨的内存）
             if output_accompaniment and "vocals" in source_names:
-                accompaniment = torch.zeros_like(sources[0, 0])
+                accompaniment = None
                 for i, name in enumerate(source_names):
                     if name != "vocals":
-                        accompaniment += sources[0, i]
+                        if accompaniment is None:
+                            accompaniment = sources[0, i].clone()
+                        else:
+                            accompaniment += sources[0, i]
+                del sources
                 
-                accompaniment = accompaniment.cpu()
                 accompaniment_path = os.path.join(output_dir, f"{base_name}_accompaniment.wav")
-                torchaudio.save(accompaniment_path, accompaniment, sr)
+                self._save_wav(accompaniment_path, accompaniment, sr)
+                del accompaniment
                 results["accompaniment"] = accompaniment_path
                 if progress_callback:
                     progress_callback("已保存: accompaniment (伴奏)")
@@ -197,6 +340,17 @@ class DemucsProcessor:
             raise ImportError(f"请安装 demucs: pip install demucs\n{str(e)}")
         except Exception as e:
             raise Exception(f"Demucs 处理失败: {str(e)}")
+    
+    def _save_wav(self, path, audio, sr):
+        """保存 (channels, samples) 的 float 音频：默认转为 16 位 PCM，float_output 时保存 32 位浮点"""
+        import torch
+        import torchaudio
+        
+        if self.float_output:
+            torchaudio.save(path, audio, sr)
+        else:
+            pcm = (audio * 32767).round_().clamp_(-32768, 32767).to(torch.int16)
+            torchaudio.save(path, pcm, sr, encoding="PCM_S", bits_per_sample=16)
 
 
 class FullVideoProcessor:
@@ -241,29 +395,46 @@ class FullVideoProcessor:
         
         current_step = 0
         
+        # Demucs 模型在后台加载，与 ffmpeg 提取音频并行
+        if need_demucs:
+            self.demucs.preload_async(progress_callback)
+        
+        # 同时需要分离和无声视频时，无声视频在后台先行生成，与音频提取、Demucs 推理并行
+        silent_video = os.path.join(output_dir, f"{base_name}_silent.mp4")
+        silent_proc = None
+        if need_demucs and output_silent_video:
+            silent_proc = self.audio_extractor.start_silent_video(video_path, silent_video)
+        
         # 1. 提取音频 (如果需要 Demucs 分离)
         if need_demucs:
-            current_step += 1
-            if progress_callback:
-                progress_callback(f"步骤 {current_step}/{total_steps}: 提取音频...")
-            
-            temp_audio = os.path.join(output_dir, f"{base_name}_temp.wav")
-            self.audio_extractor.extract_audio(video_path, temp_audio, "wav")
-            results["original_audio"] = temp_audio
-            
-            if progress_callback:
-                progress_callback("音频提取完成")
-            
-            # 2. 使用 Demucs 分离人声和伴奏
-            current_step += 1
-            if progress_callback:
-                progress_callback(f"步骤 {current_step}/{total_steps}: 分离人声和伴奏...")
-            
-            separation_results = self.demucs.separate(
-                temp_audio, output_dir, progress_callback,
-                output_vocals=output_vocals, output_accompaniment=output_accompaniment
-            )
-            results.update(separation_results)
+            try:
+                current_step += 1
+                if progress_callback:
+                    progress_callback(f"步骤 {current_step}/{total_steps}: 提取音频...")
+                
+                # ffmpeg 按模型采样率直接输出 PCM 到管道，不写临时 WAV 再由 Demucs 读回
+                wav = self.audio_extractor.read_audio_pcm(video_path, _DEMUCS_SAMPLE_RATE)
+                
+                if progress_callback:
+                    progress_callback("音频提取完成")
+                
+                # 2. 使用 Demucs 分离人声和伴奏
+                current_step += 1
+                if progress_callback:
+                    progress_callback(f"步骤 {current_step}/{total_steps}: 分离人声和伴奏...")
+                
+                separation_results = self.demucs.separate_tensor(
+                    wav, _DEMUCS_SAMPLE_RATE, output_dir, base_name, progress_callback,
+                    output_vocals=output_vocals, output_accompaniment=output_accompaniment
+                )
+                del wav
+                results.update(separation_results)
+            except BaseException:
+                # 分离失败时结束后台的无声视频进程
+                if silent_proc is not None:
+                    silent_proc.kill()
+                    silent_proc.wait()
+                raise
         
         # 3. 生成无声视频
         if output_silent_video:
@@ -271,23 +442,23 @@ class FullVideoProcessor:
             if progress_callback:
                 progress_callback(f"步骤 {current_step}/{total_steps}: 生成无声视频...")
             
-            silent_video = os.path.join(output_dir, f"{base_name}_silent.mp4")
-            self.audio_extractor.extract_silent_video(video_path, silent_video, progress_callback)
+            if silent_proc is not None:
+                if silent_proc.wait() != 0:
+                    raise subprocess.CalledProcessError(silent_proc.returncode, silent_proc.args)
+                if progress_callback:
+                    progress_callback("无声视频生成完成")
+            else:
+                self.audio_extractor.extract_silent_video(video_path, silent_video, progress_callback)
             results["silent_video"] = silent_video
         
-        # 清理临时文件（可选）
-        # os.remove(temp_audio)
-        
         if progress_callback:
             progress_callback("=" * 40)
             progress_callback("全部处理完成！输出文件：")
             for key, path in results.items():
-                if key != "original_audio":  # 不显示临时文件
-                    progress_callback(f"  {key}: {os.path.basename(path)}")
+                progress_callback(f"  {key}: {os.path.basename(path)}")
         
         return results
 
-
 if __name__ == "__main__":
     # 测试
     pass
@@ -23,9 +23,28 @@ ASR 词库管理器
 import json
 import os
 import re
+from functools import lru_cache
 from typing import Dict, List, Optional, Tuple
 from pathlib import Path
 
+# orjson 可选：解析词库 JSON 更快（未安装时回退到标准库 json）
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 尝试导入 Aho-Corasick 多模式匹配（可选，pip install pyahocorasick）
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+
+
+# 单词切分（用于术语首词索引）
+_WORD_RE = re.compile(r'\w+')
+
 
 class DictionaryManager:
     """ASR 词库管理器"""
@@ -51,7 +70,16 @@ class DictionaryManager:
         
         # 编译后的正则表达式
         self._compiled_patterns: List[Tuple[re.Pattern, str]] = []
-        self._term_patterns: Dict[re.Pattern, str] = {}
+        # 术语模式（按词库顺序）及其首词索引，None 表示需要重新编译
+        self._term_patterns: Optional[List[Tuple[re.Pattern, str]]] = None
+        self._term_index: Dict[str, List[int]] = {}
+        # 错误修正列表、casefold 后的错误形式及其 Aho-Corasick 自动机，None 表示需要重新构建
+        self._corrections: Optional[List[Tuple[str, str]]] = None
+        self._correction_keys: List[str] = []
+        self._correction_automaton = None
+        
+        # 修正结果缓存（字幕中常有重复的短句），词库变化时清空
+        self._correct_cached = lru_cache(maxsize=8192)(self._correct_text_uncached)
         
         # 加载状态
         self._loaded = False
@@ -92,8 +120,8 @@ class DictionaryManager:
             return False
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = _json_loads(f.read())
             
             # 提取所有分类中的术语
             categories = data.get("categories", {})
@@ -120,8 +148,8 @@ class DictionaryManager:
             return False
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = _json_loads(f.read())
             
             # 提取所有分类中的修正
             for category_name, category_data in data.items():
@@ -156,8 +184,8 @@ class DictionaryManager:
             return True
         
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            with open(file_path, 'rb') as f:
+                data = _json_loads(f.read())
             
             # 加载自定义术语
             terms = data.get("terms", {})
@@ -182,7 +210,7 @@ class DictionaryManager:
     def _compile_patterns(self):
         """编译正则表达式模式"""
         self._compiled_patterns = []
-        self._term_patterns = {}
+        self._correct_cached.cache_clear()
         
         # 编译正则表达式修正模式
         for pattern_data in self.regex_patterns:
@@ -203,15 +231,74 @@ class DictionaryManager:
             except Exception as e:
                 print(f"编译正则表达式失败: {pattern_data.get('name', 'unknown')} - {e}")
         
-        # 编译术语匹配模式
+        self._compile_term_patterns()
+        self._build_correction_index()
+    
+    def _build_correction_index(self):
+        """
+        构建错误修正索引
+        
+        自动机以 casefold 后的错误形式为键，值为共享该键的修正序号列表，
+        仅用于一次扫描找出文本中可能出现的修正项
+        """
+        self._corrections = list({**self.error_corrections, **self.custom_corrections}.items())
+        self._correction_keys = [wrong.casefold() for wrong, _ in self._corrections]
+        self._correction_automaton = None
+        if not AHOCORASICK_AVAILABLE or not self._corrections:
+            return
+        
+        automaton = ahocorasick.Automaton()
+        for index, key in enumerate(self._correction_keys):
+            if not key:
+                continue
+            if key in automaton:
+                automaton.get(key).append(index)
+            else:
+                automaton.add_word(key, [index])
+        automaton.make_automaton()
+        self._correction_automaton = automaton
+    
+    def _correction_candidates(self, text: str, start: int = 0) -> List[int]:
+        """返回从 start 起可能出现在文本中（不区分大小写）的修正序号，按词库顺序排列"""
+        folded = text.casefold()
+        if self._correction_automaton is None:
+            # 未安装 pyahocorasick：文本只 casefold 一次，逐项做子串预筛选
+            keys = self._correction_keys
+            return [i for i in range(start, len(keys)) if keys[i] and keys[i] in folded]
+        
+        found = set()
+        for _, indices in self._correction_automaton.iter(folded):
+            found.update(indices)
+        return sorted(index for index in found if index >= start)
+    
+    def _compile_term_patterns(self):
+        """
+        编译术语匹配模式，并按术语的首个单词建立索引
+        
+        修正时只需对文本分词一次，再对首词出现在文本中的术语执行替换
+        """
+        self._term_patterns = []
+        self._term_index = {}
         all_terms = {**self.technical_terms, **self.custom_terms}
         for term_lower, term_correct in all_terms.items():
             try:
                 # 使用词边界匹配
                 pattern = re.compile(r'\b' + re.escape(term_lower) + r'\b', re.IGNORECASE)
-                self._term_patterns[pattern] = term_correct
             except Exception as e:
                 print(f"编译术语模式失败: {term_lower} - {e}")
+                continue
+            # 不含单词字符的术语（键为空串）每次都需要检查
+            words = _WORD_RE.findall(term_lower.casefold())
+            first_word = words[0] if words else ''
+            self._term_index.setdefault(first_word, []).append(len(self._term_patterns))
+            self._term_patterns.append((pattern, term_correct))
+    
+    def _term_candidates(self, text: str, start: int = 0) -> List[int]:
+        """返回从 start 起首词出现在文本中的术语序号，按词库顺序排列"""
+        words = set(_WORD_RE.findall(text.casefold()))
+        words.add('')
+        index = self._term_index
+        return sorted(i for word in words if word in index for i in index[word] if i >= start)
     
     def reload(self) -> bool:
         """
@@ -227,7 +314,8 @@ class DictionaryManager:
         self.custom_corrections.clear()
         self.regex_patterns.clear()
         self._compiled_patterns.clear()
-        self._term_patterns.clear()
+        self._term_patterns = None
+        self._corrections = None
         
         return self.load_all()
     
@@ -244,9 +332,23 @@ class DictionaryManager:
         if not self._loaded:
             self.load_all()
         
+        return self._correct_cached(text)
+    
+    def _correct_text_uncached(self, text: str) -> str:
+        """执行修正（不经过缓存）"""
         # 1. 应用错误修正（支持大小写不敏感匹配）
-        all_corrections = {**self.error_corrections, **self.custom_corrections}
-        for wrong, correct in all_corrections.items():
+        # 按词库顺序依次替换（前一项的结果可能触发后一项），
+        # 只检查自动机找出的候选项，文本变化后重新扫描剩余部分
+        if self._corrections is None:
+            self._build_correction_index()
+        corrections = self._corrections
+        candidates = self._correction_candidates(text)
+        position = 0
+        while position < len(candidates):
+            index = candidates[position]
+            position += 1
+            wrong, correct = corrections[index]
+            original = text
             # 先尝试精确匹配
             if wrong in text:
                 text = text.replace(wrong, correct)
@@ -254,20 +356,46 @@ class DictionaryManager:
             elif wrong.lower() in text.lower():
                 pattern = re.compile(re.escape(wrong), re.IGNORECASE)
                 text = pattern.sub(correct, text)
-            continue
+            if text != original:
+                candidates = self._correction_candidates(text, index + 1)
+                position = 0
         
         # 额外处理：确保错误修正被应用
-        for wrong, correct in all_corrections.items():
+        candidates = self._correction_candidates(text)
+        position = 0
+        while position < len(candidates):
+            index = candidates[position]
+            position += 1
+            wrong, correct = corrections[index]
             if wrong in text:
+                original = text
                 text = text.replace(wrong, correct)
+                if text != original:
+                    candidates = self._correction_candidates(text, index + 1)
+                    position = 0
         
         # 2. 应用正则表达式修正
         for pattern, replacement in self._compiled_patterns:
             text = pattern.sub(replacement, text)
         
         # 3. 应用术语修正（词边界匹配）
-        for pattern, correct in self._term_patterns.items():
-            text = pattern.sub(correct, text)
+        # 按词库顺序依次替换（重叠的术语如 "premiere pro" 与 "pro tools" 都要生效），
+        # 只检查首词出现在文本中的术语，替换改变了单词时重新分词
+        if self._term_patterns is None:
+            self._compile_term_patterns()
+        candidates = self._term_candidates(text)
+        position = 0
+        while position < len(candidates):
+            index = candidates[position]
+            position += 1
+            pattern, correct = self._term_patterns[index]
+            corrected = pattern.sub(correct, text)
+            if corrected != text:
+                words_changed = corrected.casefold() != text.casefold()
+                text = corrected
+                if words_changed:
+                    candidates = self._term_candidates(text, index + 1)
+                    position = 0
         
         return text
     
@@ -298,15 +426,15 @@ class DictionaryManager:
         Returns:
             是否成功添加
         """
+        # 先加载已有词库，避免保存时覆盖文件中的自定义内容
+        if not self._loaded:
+            self.load_all()
+        
         self.custom_terms[term_lower.lower()] = term_correct
         
-        # 编译新的模式
-        try:
-            pattern = re.compile(r'\b' + re.escape(term_lower.lower()) + r'\b', re.IGNORECASE)
-            self._term_patterns[pattern] = term_correct
-        except Exception as e:
-            print(f"编译术语模式失败: {term_lower} - {e}")
-            return False
+        # 术语模式在下次修正时重新编译
+        self._term_patterns = None
+        self._correct_cached.cache_clear()
         
         if save:
             return self._save_custom_terms()
@@ -325,8 +453,15 @@ class DictionaryManager:
         Returns:
             是否成功添加
         """
+        if not self._loaded:
+            self.load_all()
+        
         self.custom_corrections[wrong] = correct
         
+        # 修正索引在下次修正时重新构建
+        self._corrections = None
+        self._correct_cached.cache_clear()
+        
         if save:
             return self._save_custom_terms()
         
@@ -356,10 +491,14 @@ class DictionaryManager:
     
     def get_all_terms(self) -> Dict[str, str]:
         """获取所有术语（包括内置和自定义）"""
+        if not self._loaded:
+            self.load_all()
         return {**self.technical_terms, **self.custom_terms}
     
     def get_all_corrections(self) -> Dict[str, str]:
         """获取所有修正（包括内置和自定义）"""
+        if not self._loaded:
+            self.load_all()
         return {**self.error_corrections, **self.custom_corrections}
     
     def search_term(self, query: str) -> List[Tuple[str, str]]:
@@ -384,6 +523,8 @@ class DictionaryManager:
     
     def get_stats(self) -> Dict:
         """获取词库统计信息"""
+        if not self._loaded:
+            self.load_all()
         return {
             "technical_terms": len(self.technical_terms),
             "error_corrections": len(self.error_corrections),
@@ -416,11 +557,10 @@ _dictionary_manager: Optional[DictionaryManager] = None
 
 
 def get_dictionary_manager() -> DictionaryManager:
-    """获取词库管理器单例"""
+    """获取词库管理器单例（词库在首次使用时才加载）"""
     global _dictionary_manager
     if _dictionary_manager is None:
         _dictionary_manager = DictionaryManager()
-        _dictionary_manager.load_all()
     return _dictionary_manager
 
 
@@ -466,106 +466,209 @@ def _split_long_segment(segment, max_chars, sentence_endings):
     return result
 
 
+def load_models(model_size, model_dir=None, use_vad=True):
+    """
+    加载 Whisper 模型（以及可选的 Silero VAD 模型）
+    
+    Args:
+        model_size: Whisper 模型大小
+        model_dir: 模型目录
+        use_vad: 是否加载 Silero VAD
+        
+    Returns:
+        dict: 模型状态，供 transcribe_file 重复使用
+    """
+    # Set model directory if provided
+    if model_dir:
+        os.environ['WHISPER_CACHE_DIR'] = model_dir
+        
+    import whisper
+    import torch
+    
+    # Check if CUDA is available
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    print(f"Using device: {device}", file=sys.stderr)
+    
+    # 加载 Silero VAD（如果启用）
+    vad = None
+    if use_vad:
+        try:
+            print("Loading Silero-VAD model...", file=sys.stderr)
+            vad = load_silero_vad()
+        except Exception as e:
+            print(f"Warning: VAD failed, continuing without it: {e}", file=sys.stderr)
+            vad = None
+    
+    # Load Whisper model
+    print(f"Loading Whisper model: {model_size}...", file=sys.stderr)
+    model = whisper.load_model(model_size, download_root=model_dir, device=device)
+    
+    return {"model": model, "vad": vad}
+
+
+def transcribe_file(state, audio_path, language=None, use_vad=True, vad_threshold=0.5,
+                    word_timestamps=True):
+    """
+    使用已加载的模型转录单个音频文件
+    
+    Args:
+        state: load_models 返回的模型状态
+        audio_path: 音频文件路径
+        language: 语言代码
+        use_vad: 是否使用 VAD
+        vad_threshold: VAD 阈值 (0-1)
+        word_timestamps: 是否生成词级时间戳（需要额外的对齐解码，不需要时关闭可明显提速）
+        
+    Returns:
+        dict: 转录结果
+    """
+    vad_segments = None
+    if use_vad and state["vad"] is not None:
+        try:
+            vad_model, get_speech_timestamps, read_audio = state["vad"]
+            print("Running VAD analysis...", file=sys.stderr)
+            vad_segments = get_vad_segments(
+                audio_path, 
+                vad_model, 
+                get_speech_timestamps, 
+                read_audio,
+                threshold=vad_threshold
+            )
+            print(f"VAD detected {len(vad_segments)} speech segments", file=sys.stderr)
+            
+        except Exception as e:
+            print(f"Warning: VAD failed, continuing without it: {e}", file=sys.stderr)
+            vad_segments = None
+    
+    # 增强版 Whisper 转录参数
+    # 原始音频 → Silero-VAD → Whisper(带参数优化) → 智能合并模块
+    transcribe_options = {
+        "language": language if language and language != "None" else None,
+        "word_timestamps": word_timestamps,  # 词级时间戳，精确同步
+        "condition_on_previous_text": False,  # 关闭以减少错误累积和幻觉
+        "no_speech_threshold": 0.6,  # 静音检测阈值
+        "logprob_threshold": -1.0,  # 对数概率阈值，过滤低置信度
+        "compression_ratio_threshold": 2.4,  # 压缩比阈值，检测重复
+        "temperature": 0.0,  # 降低随机性，提升一致性
+        "best_of": 5,  # 增加解码质量，选择最佳结果
+    }
+    
+    # 如果有 VAD 结果，使用更严格的参数
+    if vad_segments:
+        transcribe_options["no_speech_threshold"] = 0.5
+        # VAD 已经过滤了静音，可以更激进地检测幻觉
+        transcribe_options["logprob_threshold"] = -0.8
+    
+    print("Starting transcription...", file=sys.stderr)
+    result = state["model"].transcribe(audio_path, **transcribe_options)
+    
+    segments = result["segments"]
+    
+    # 使用 VAD 结果优化
+    if vad_segments:
+        print("Filtering hallucinations with VAD...", file=sys.stderr)
+        segments = filter_hallucinations(segments, vad_segments)
+        
+        print("Adjusting timestamps with VAD...", file=sys.stderr)
+        segments = adjust_timestamps_with_vad(segments, vad_segments)
+    
+    # 检测并移除循环重复
+    print("Detecting repetition loops...", file=sys.stderr)
+    segments = detect_repetition_loops(segments)
+    
+    # 智能合并模块：合并过短段落
+    print("Smart merging segments...", file=sys.stderr)
+    segments = smart_merge_segments(segments)
+    
+    # 智能句子重组：基于语义边界优化分段
+    print("Intelligent sentence restructuring...", file=sys.stderr)
+    segments = intelligent_sentence_restructure(segments)
+    
+    return {
+        "segments": segments,
+        "text": result["text"],
+        "vad_enabled": use_vad and vad_segments is not None,
+        "vad_segments_count": len(vad_segments) if vad_segments else 0
+    }
+
+
+def serve(state, default_use_vad=True, default_vad_threshold=0.5):
+    """
+    常驻工作模式：模型只加载一次，循环处理 stdin 上的任务
+    
+    每行一个 JSON 任务 {"audio_path": ..., "language": ..., "use_vad": ..., "vad_threshold": ...,
+    "word_timestamps": ...}，
+    每个任务在 stdout 逐行输出结果：每个段落一行 {"type": "segment", ...}，
+    最后一行 {"type": "done", ...}（失败时为一行 {"type": "error", "error": ...}）。
+    收到 {"cmd": "exit"} 或 stdin 关闭时退出。
+    """
+    out = sys.stdout
+    # 转录过程中库的打印内容转到 stderr，stdout 只保留协议输出
+    sys.stdout = sys.stderr
+    
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            job = json.loads(line)
+            if job.get("cmd") == "exit":
+                break
+            result = transcribe_file(
+                state,
+                job["audio_path"],
+                language=job.get("language"),
+                use_vad=job.get("use_vad", default_use_vad),
+                vad_threshold=job.get("vad_threshold", default_vad_threshold),
+                word_timestamps=job.get("word_timestamps", True)
+            )
+        except Exception as e:
+            import traceback
+            traceback.print_exc(file=sys.stderr)
+            out.write(json.dumps({"type": "error", "error": str(e)}) + "\n")
+            out.flush()
+            continue
+        
+        # 逐段输出，避免把整个结果序列化成一个大字符串
+        for seg in result.pop("segments"):
+            out.write(json.dumps({"type": "segment", **seg}) + "\n")
+        out.write(json.dumps({"type": "done", **result}) + "\n")
+        out.flush()
+
+
 def main():
     parser = argparse.ArgumentParser(description="Run Whisper ASR in a separate process with Silero-VAD")
-    parser.add_argument("audio_path", help="Path to the input audio file")
+    parser.add_argument("audio_path", nargs="?", default=None, help="Path to the input audio file")
     parser.add_argument("--model", default="base", help="Whisper model size")
     parser.add_argument("--language", default=None, help="Language code")
     parser.add_argument("--model_dir", default=None, help="Custom model directory")
     parser.add_argument("--use_vad", default="true", help="Use Silero-VAD for better accuracy")
     parser.add_argument("--vad_threshold", type=float, default=0.5, help="VAD threshold (0-1)")
+    parser.add_argument("--word_timestamps", default="true", help="Generate word-level timestamps")
+    parser.add_argument("--serve", action="store_true",
+                        help="Keep the model loaded and read newline-delimited JSON jobs from stdin")
     
     args = parser.parse_args()
     use_vad = args.use_vad.lower() == "true"
     
+    if not args.serve and not args.audio_path:
+        parser.error("audio_path is required unless --serve is given")
+    
     try:
-        # Set model directory if provided
-        if args.model_dir:
-            os.environ['WHISPER_CACHE_DIR'] = args.model_dir
-            
-        import whisper
-        import torch
-        
-        # Check if CUDA is available
-        device = "cuda" if torch.cuda.is_available() else "cpu"
-        print(f"Using device: {device}", file=sys.stderr)
-        
-        # 加载 Silero VAD（如果启用）
-        vad_segments = None
-        if use_vad:
-            try:
-                print("Loading Silero-VAD model...", file=sys.stderr)
-                vad_model, get_speech_timestamps, read_audio = load_silero_vad()
-                
-                print("Running VAD analysis...", file=sys.stderr)
-                vad_segments = get_vad_segments(
-                    args.audio_path, 
-                    vad_model, 
-                    get_speech_timestamps, 
-                    read_audio,
-                    threshold=args.vad_threshold
-                )
-                print(f"VAD detected {len(vad_segments)} speech segments", file=sys.stderr)
-                
-            except Exception as e:
-                print(f"Warning: VAD failed, continuing without it: {e}", file=sys.stderr)
-                vad_segments = None
-        
-        # Load Whisper model
-        print(f"Loading Whisper model: {args.model}...", file=sys.stderr)
-        model = whisper.load_model(args.model, download_root=args.model_dir, device=device)
-        
-        # 增强版 Whisper 转录参数
-        # 原始音频 → Silero-VAD → Whisper(带参数优化) → 智能合并模块
-        transcribe_options = {
-            "language": args.language if args.language and args.language != "None" else None,
-            "word_timestamps": True,  # 启用词级时间戳，精确同步
-            "condition_on_previous_text": False,  # 关闭以减少错误累积和幻觉
-            "no_speech_threshold": 0.6,  # 静音检测阈值
-            "logprob_threshold": -1.0,  # 对数概率阈值，过滤低置信度
-            "compression_ratio_threshold": 2.4,  # 压缩比阈值，检测重复
-            "temperature": 0.0,  # 降低随机性，提升一致性
-            "best_of": 5,  # 增加解码质量，选择最佳结果
-        }
-        
-        # 如果有 VAD 结果，使用更严格的参数
-        if vad_segments:
-            transcribe_options["no_speech_threshold"] = 0.5
-            # VAD 已经过滤了静音，可以更激进地检测幻觉
-            transcribe_options["logprob_threshold"] = -0.8
-        
-        print("Starting transcription...", file=sys.stderr)
-        result = model.transcribe(args.audio_path, **transcribe_options)
-        
-        segments = result["segments"]
-        
-        # 使用 VAD 结果优化
-        if vad_segments:
-            print("Filtering hallucinations with VAD...", file=sys.stderr)
-            segments = filter_hallucinations(segments, vad_segments)
-            
-            print("Adjusting timestamps with VAD...", file=sys.stderr)
-            segments = adjust_timestamps_with_vad(segments, vad_segments)
-        
-        # 检测并移除循环重复
-        print("Detecting repetition loops...", file=sys.stderr)
-        segments = detect_repetition_loops(segments)
-        
-        # 智能合并模块：合并过短段落
-        print("Smart merging segments...", file=sys.stderr)
-        segments = smart_merge_segments(segments)
-        
-        # 智能句子重组：基于语义边界优化分段
-        print("Intelligent sentence restructuring...", file=sys.stderr)
-        segments = intelligent_sentence_restructure(segments)
-        
-        # Output result as JSON
-        output = {
-            "segments": segments,
-            "text": result["text"],
-            "vad_enabled": use_vad and vad_segments is not None,
-            "vad_segments_count": len(vad_segments) if vad_segments else 0
-        }
+        state = load_models(args.model, args.model_dir, use_vad)
+        
+        if args.serve:
+            serve(state, default_use_vad=use_vad, default_vad_threshold=args.vad_threshold)
+            return
+        
+        output = transcribe_file(
+            state,
+            args.audio_path,
+            language=args.language,
+            use_vad=use_vad,
+            vad_threshold=args.vad_threshold,
+            word_timestamps=args.word_timestamps.lower() == "true"
+        )
         
         # Print JSON to stdout
         print(json.dumps(output))